@@ -1,10 +1,20 @@
 # types hint
 from __future__ import annotations
 
+# std import
+import json
+
 # local import
 from .transaction import Transaction
 from ..exceptions import DeserializeHashValueCheckError
-from ..tools.hash_tools import compute_hash
+from ..tools.hash_tools import compute_hash, compute_binary_hash, get_hash_encoding
+from ..tools.binary_encoding import BLOCK_CORE_SCHEMA
+from ..tools.merkle_tools import merkle_leaf, merkle_root, merkle_proof
+
+
+# 拼接区块编码数据时, 交易列表的占位值
+_TXS_PLACEHOLDER = '__block_transactions_placeholder__'
+_TXS_PLACEHOLDER_JSON = json.dumps(_TXS_PLACEHOLDER).encode()
 
 
 class Block:
@@ -12,15 +22,17 @@ class Block:
     区块
     """
     __slots__ = [
-        'index', 'timestamp', 'transactions', 'nonce', 'prev_hash', 'hash', 'difficulty',
-        '_runtime_is_from_peer', '_runtime_is_genesis'
+        'index', 'timestamp', 'transactions', 'merkle_root', 'nonce', 'prev_hash', 'hash', 'difficulty',
+        '_runtime_is_from_peer', '_runtime_is_genesis',
+        '_runtime_serialized', '_runtime_encoded'
     ]
     frozen_fields = (
-        'index', 'timestamp', 'transactions', 'nonce', 'prev_hash', 'hash', 'difficulty',
-        '_runtime_is_from_peer', '_runtime_is_genesis'
+        'index', 'timestamp', 'transactions', 'merkle_root', 'nonce', 'prev_hash', 'hash', 'difficulty',
+        '_runtime_is_from_peer', '_runtime_is_genesis',
+        '_runtime_serialized', '_runtime_encoded'
     )
     # 序列化、反序列化时的字段
-    serialized_fields = ('index', 'timestamp', 'transactions', 'nonce', 'prev_hash', 'hash', 'difficulty',)
+    serialized_fields = ('index', 'timestamp', 'transactions', 'merkle_root', 'nonce', 'prev_hash', 'hash', 'difficulty',)
 
     def __init__(self, index, timestamp, transactions: list[Transaction], nonce, prev_hash, difficulty):
         ## core data
@@ -31,6 +43,9 @@ class Block:
         object.__setattr__(self, 'prev_hash', prev_hash)
         object.__setattr__(self, 'difficulty', difficulty)
 
+        ## merkle root, 区块头只包含交易的merkle root
+        object.__setattr__(self, 'merkle_root', self.compute_merkle_root())
+
         ## hash
         object.__setattr__(self, 'hash', self.compute_hash())
 
@@ -41,6 +56,10 @@ class Block:
         object.__setattr__(self, '_runtime_is_from_peer', False)
         object.__setattr__(self, '_runtime_is_genesis', False)
 
+        ## 序列化缓存, 区块的所有字段均不可修改
+        object.__setattr__(self, '_runtime_serialized', None)
+        object.__setattr__(self, '_runtime_encoded', None)
+
     @property
     def summary(self) -> "BlockSummary":
         return BlockSummary(self)
@@ -73,31 +92,64 @@ class Block:
 
     def block_core_data(self) -> dict:
         """
-        区块核心数据，参与hash计算
+        区块核心数据(区块头)，参与hash计算, 交易通过merkle root参与
 
         :return:
         """
         return {
             'index': self.index,
             'timestamp': self.timestamp,
-            'transactions': [t.serialize() for t in self.transactions],
+            'merkle_root': self.merkle_root,
             'nonce': self.nonce,
             'prev_hash': self.prev_hash,
             'difficulty': self.difficulty
         }
 
+    def merkle_leaves(self) -> list[bytes]:
+        return [merkle_leaf(t.hash, t.signature) for t in self.transactions]
+
+    def compute_merkle_root(self) -> str:
+        return merkle_root(self.merkle_leaves())
+
+    def merkle_proof(self, position: int) -> list[list[str]]:
+        """
+        区块内第position个交易的包含证明, 见merkle_tools.merkle_proof
+        """
+        return merkle_proof(self.merkle_leaves(), position)
+
+    def serialize_header(self) -> dict:
+        """
+        区块头及区块hash, 用于headers-first同步(在下载区块之前验证链的hash链接与PoW)
+        """
+        header = self.block_core_data()
+        header['hash'] = self.hash
+        return header
+
+    @staticmethod
+    def compute_header_hash(header: dict) -> str:
+        """
+        根据区块头数据(serialize_header/block_core_data)计算区块hash, 与compute_hash的结果一致
+        """
+        if get_hash_encoding() == 'binary':
+            return compute_binary_hash(BLOCK_CORE_SCHEMA, header)
+        return compute_hash({f: header.get(f, None) for f in BLOCK_CORE_SCHEMA.fields})
+
     def compute_hash(self) -> str:
         """
         区块的哈希算法
 
         :return: str
         """
+        if get_hash_encoding() == 'binary':
+            return compute_binary_hash(BLOCK_CORE_SCHEMA, self)
         return compute_hash(self.block_core_data())
 
     @classmethod
-    def deserialize(cls, data: dict | None) -> "Block | None":
+    def deserialize(cls, data: dict | None, verify_hash: bool = True) -> "Block | None":
         """
         从dict加载数据
+
+        :param verify_hash: 是否重新计算区块及交易的hash并与数据中的hash比对, 只有加载本地已验证过的数据时才可以跳过
         """
         if data is None:
             return None
@@ -108,18 +160,30 @@ class Block:
             if f == 'transactions':  # 单独单独处理TX的反序列化
                 object.__setattr__(
                     b, f,
-                    [Transaction.deserialize(d) for d in data.get(f, [])]
+                    [Transaction.deserialize(d, verify_hash) for d in data.get(f, [])]
                 )
                 continue
 
-            if f == 'hash':  # 跳过hash字段的赋值
+            if f in ('hash', 'merkle_root'):  # 跳过hash字段的赋值
                 continue
 
             object.__setattr__(b, f, data.get(f, None))
 
+        # merkle root一致性检查
+        data_merkle_root = data.get('merkle_root', None)
+        if verify_hash or data_merkle_root is None:
+            computed_merkle_root = b.compute_merkle_root()
+            if data_merkle_root is not None and computed_merkle_root != data_merkle_root:
+                raise DeserializeHashValueCheckError(
+                    f"Block Data compute merkle root: {computed_merkle_root}, data merkle root: {data_merkle_root}"
+                )
+            object.__setattr__(b, 'merkle_root', computed_merkle_root)
+        else:
+            object.__setattr__(b, 'merkle_root', data_merkle_root)
+
         # hash一致性检查
-        computed_hash = b.compute_hash()
         data_hash = data.get('hash', None)
+        computed_hash = b.compute_hash() if verify_hash else data_hash
         if computed_hash == data_hash:
             object.__setattr__(b, 'hash', computed_hash)
         else:
@@ -129,6 +193,12 @@ class Block:
         return b
 
     def serialize(self) -> dict:
+        """
+        序列化结果会被缓存, 调用方不可修改返回的dict
+        """
+        if self._runtime_serialized is not None:
+            return self._runtime_serialized
+
         d = {}
         for f in self.serialized_fields:
             if f == 'transactions':  # 单独单独处理TX的序列化
@@ -136,8 +206,25 @@ class Block:
                 continue
             d[f] = getattr(self, f)
 
+        object.__setattr__(self, '_runtime_serialized', d)
         return d
 
+    def encoded(self) -> bytes:
+        """
+        序列化后的json数据(缓存), 与json.dumps(self.serialize(), sort_keys=True)一致,
+        交易部分直接拼接各交易已缓存的编码数据, 不重复编码
+        """
+        if self._runtime_encoded is not None:
+            return self._runtime_encoded
+
+        header = {f: getattr(self, f) for f in self.serialized_fields if f != 'transactions'}
+        header['transactions'] = _TXS_PLACEHOLDER
+        prefix, _, suffix = json.dumps(header, sort_keys=True).encode().partition(_TXS_PLACEHOLDER_JSON)
+        txs = b', '.join(t.encoded() for t in self.transactions)
+
+        object.__setattr__(self, '_runtime_encoded', b''.join((prefix, b'[', txs, b']', suffix)))
+        return self._runtime_encoded
+
 
 class BlockSummary:
     """
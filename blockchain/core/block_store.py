@@ -0,0 +1,181 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : block_store.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/8 20:15
+# 区块持久化存储
+#
+# 区块按上链顺序追加写入segment文件, 每条记录的结构为:
+#   magic(4B) | payload长度(4B) | payload的crc32(4B) | payload(区块序列化后的json)
+# 内存中维护 height -> 记录偏移量 的索引, 回滚区块时直接截断文件
+# 读取通过mmap进行, 归档模式下的历史区块按需从mmap中反序列化, 不常驻内存
+
+# std import
+import os
+import json
+import zlib
+import mmap
+import struct
+import threading
+from time import monotonic
+
+# 3rd import
+from loguru import logger
+
+
+__all__ = ['BlockStore']
+
+
+RECORD_MAGIC = b'BLK1'
+RECORD_HEADER = struct.Struct('>4sII')  # magic, payload length, crc32
+
+
+class BlockStore:
+    segment_file_name = 'blocks.dat'
+
+    def __init__(self, data_dir: str, sync_every: int = 32, sync_interval: float = 1.0):
+        """
+        :param data_dir: 数据目录
+        :param sync_every: 累计写入多少条记录后执行一次fsync
+        :param sync_interval: 距离上次fsync超过多少秒后, 下一次写入时执行fsync
+        """
+        self.data_dir = data_dir
+        self.segment_path = os.path.join(data_dir, self.segment_file_name)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self._lock = threading.Lock()
+        self._offsets: list[int] = []  # height -> 记录在segment文件中的偏移量
+        self._pending_sync = 0
+        self._last_sync = monotonic()
+        self._mmap: mmap.mmap | None = None
+
+        os.makedirs(data_dir, exist_ok=True)
+        self._file = open(self.segment_path, 'a+b')
+        self._recover()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    @property
+    def end_offset(self) -> int:
+        return self._file.seek(0, os.SEEK_END)
+
+    def _recover(self):
+        """
+        扫描segment文件重建偏移量索引, 遇到不完整(写入时崩溃)或校验失败的记录时, 从该记录处截断文件
+        """
+        f = self._file
+        file_size = f.seek(0, os.SEEK_END)
+        offset = 0
+        f.seek(0)
+
+        while offset < file_size:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+
+            magic, length, checksum = RECORD_HEADER.unpack(header)
+            if magic != RECORD_MAGIC:
+                break
+
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+
+            self._offsets.append(offset)
+            offset += RECORD_HEADER.size + length
+
+        if offset < file_size:
+            logger.warning(f"区块存储文件在偏移量{offset}处损坏或不完整, 截断文件, 丢弃{file_size - offset}字节")
+            f.truncate(offset)
+            self._fsync()
+
+        logger.info(f"区块存储已加载, 区块数量: {len(self._offsets)}, 文件: {self.segment_path}")
+
+    def _fsync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending_sync = 0
+        self._last_sync = monotonic()
+
+    @staticmethod
+    def encode_block_data(block_data: dict) -> bytes:
+        return json.dumps(block_data, sort_keys=True).encode()
+
+    def append(self, block_data: dict | bytes):
+        """
+        追加写入一个区块(序列化后的数据, 或已编码的json数据), 按批次执行fsync
+        """
+        payload = block_data if isinstance(block_data, bytes) else self.encode_block_data(block_data)
+        with self._lock:
+            offset = self.end_offset
+            self._file.write(RECORD_HEADER.pack(RECORD_MAGIC, len(payload), zlib.crc32(payload)))
+            self._file.write(payload)
+            self._offsets.append(offset)
+
+            self._pending_sync += 1
+            if self._pending_sync >= self.sync_every or monotonic() - self._last_sync >= self.sync_interval:
+                self._fsync()
+
+    def _close_mmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _get_mmap(self, end: int) -> mmap.mmap:
+        """
+        获取覆盖[0, end)范围的只读mmap, 文件增长后重新映射
+        """
+        if self._mmap is None or len(self._mmap) < end:
+            self._close_mmap()
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def truncate(self, height: int):
+        """
+        删除height(含)之后的所有区块
+        """
+        with self._lock:
+            if height >= len(self._offsets):
+                return
+
+            # 截断被映射的文件后访问映射区域会触发SIGBUS, 截断前先关闭mmap
+            self._close_mmap()
+            self._file.truncate(self._offsets[height])
+            del self._offsets[height:]
+            self._fsync()
+
+    def read(self, height: int) -> dict:
+        """
+        读取指定height的区块数据
+        """
+        with self._lock:
+            # 记录在文件中连续存放, 最后一条记录的结尾即文件结尾
+            offset = self._offsets[height]
+            end = self._offsets[height + 1] if height + 1 < len(self._offsets) else self.end_offset
+
+            mm = self._get_mmap(end)
+            return json.loads(mm[offset + RECORD_HEADER.size:end])
+
+    def iter_blocks(self):
+        """
+        按height顺序遍历所有区块数据
+        """
+        for height in range(len(self)):
+            yield self.read(height)
+
+    def sync(self):
+        """
+        将尚未fsync的数据落盘
+        """
+        with self._lock:
+            if self._pending_sync:
+                self._fsync()
+
+    def close(self):
+        with self._lock:
+            self._close_mmap()
+            self._fsync()
+            self._file.close()
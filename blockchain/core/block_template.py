@@ -0,0 +1,115 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : block_template.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/6 15:40
+# 挖矿区块模板
+#
+# 区块模板由 链的tip + 交易池数据 + 难度 组成, 每当区块上链/回滚、交易进入交易池时模板版本(revision)递增,
+# 矿工通过轻量的state接口(支持长轮询)判断手上的模板是否过期
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ..types.role_types import Node
+
+# std import
+import threading
+from time import monotonic
+
+
+__all__ = ['BlockTemplateManager']
+
+
+class BlockTemplateManager:
+    def __init__(self, current_node: Node):
+        self.current_node = current_node
+
+        self._revision = 0
+        self._cond = threading.Condition()
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    def notify(self):
+        """
+        区块链或交易池发生变化, 递增模板版本并唤醒所有长轮询请求
+        """
+        with self._cond:
+            self._revision += 1
+            self._cond.notify_all()
+
+    def etag(self, state: dict) -> str:
+        return f"{state['revision']}-{state['tip_hash']}"
+
+    def state(self) -> dict:
+        """
+        模板状态, O(1)
+
+        {
+            'revision': 模板版本,
+            'tip_hash': 链的tip区块hash,
+            'height': 链的高度,
+            'tx_count': 交易池中的交易数量,
+            'etag': 模板版本标识
+        }
+        """
+        blockchain = self.current_node.blockchain
+        last_block = blockchain.last_block
+        state = {
+            'revision': self._revision,
+            'tip_hash': last_block.hash if last_block else None,
+            'height': len(blockchain),
+            'tx_count': len(self.current_node.txpool),
+        }
+        state['etag'] = self.etag(state)
+        return state
+
+    def wait_for_change(self, known_etag: str | None, timeout: float) -> dict:
+        """
+        长轮询: 阻塞至模板版本标识与known_etag不同, 或等待超时
+
+        :return: 最新的模板状态
+        """
+        deadline = monotonic() + timeout
+        with self._cond:
+            state = self.state()
+            while known_etag is not None and state['etag'] == known_etag:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                state = self.state()
+
+        return state
+
+    def build(self, miner_addr: str) -> dict:
+        """
+        生成矿工的区块模板
+
+        {
+            'state': 模板状态(生成模板时的state),
+            'index': 新区块的index,
+            'prev_hash': 新区块的prev_hash,
+            'difficulty': 难度,
+            'hash_startwith': 区块hash应当以此值开头,
+            'hash_encoding': hash计算时数据的编码方式,
+            'transactions': 交易数据(包含矿工的奖励交易)
+        }
+        """
+        blockchain = self.current_node.blockchain
+        state = self.state()
+        last_block = blockchain.last_block
+        transactions = self.current_node.txpool.get_mining_data(miner_addr)
+
+        return {
+            'state': state,
+            'index': last_block.index + 1 if last_block else 1,
+            'prev_hash': last_block.hash if last_block else None,
+            'difficulty': blockchain.pow_difficulty,
+            'hash_startwith': blockchain.pow_check,
+            'hash_encoding': blockchain.hash_encoding,
+            'transactions': [t.serialize() for t in transactions],
+        }
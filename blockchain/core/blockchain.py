@@ -2,18 +2,20 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
+    from typing import Callable
     from ..types.role_types import Node, TaskQueue
     from ..types.network_types import PeerClient
-
-# std import
-from functools import reduce
+    from ..types.core_types import Transaction, BlockStore
 
 # 3rd import
 from loguru import logger
 
 # local import
 from ..tools.threading_lock import Lock
-from .block import BlockSummary, Block
+from ..tools.lru_cache import LRUCache
+from ..tools.hash_tools import get_hash_encoding
+from ..exceptions import BlockStoreHashEncodingMismatchError
+from .block import Block
 from .execute_result import ExecuteResult, ExecuteResultErrorTypes
 
 
@@ -21,25 +23,125 @@ bcl = Lock()
 
 
 class BlockChain:
-    def __init__(self, current_node: Node):
+    def __init__(
+            self, current_node: Node, block_store: BlockStore | None = None,
+            archive_depth: int | None = None, archive_cache_size: int = 128
+        ):
+        """
+        :param block_store: 区块持久化存储, None为不持久化
+        :param archive_depth: 归档模式, 距离链顶超过此深度的区块不再常驻内存, 访问时从区块存储中按需加载,
+                              None为不归档(需要配合block_store使用)
+        :param archive_cache_size: 归档模式下, 按需加载的区块的LRU缓存大小
+        """
         self.current_node = current_node
         self.tq: TaskQueue = self.current_node.task_queue
         self.peer_client: PeerClient = self.current_node.peer_client
+        self.block_store = block_store
+        self.archive_depth = archive_depth if block_store is not None else None
 
-        # core
-        self.__chain: list[Block] = []
+        # core, 归档模式下已归档的区块在列表中为None
+        self.__chain: list[Block | None] = []
+        self.__archived_count = 0  # 链首部已归档的区块数量
+        self.__archive_cache = LRUCache(archive_cache_size)  # height -> 按需加载的区块
+
+        # index: 随区块上链/回滚增量维护, height为区块在链上的位置(从0开始)
+        self.__balances: dict[str, int] = {}  # 地址 -> 余额
+        self.__block_heights: dict[str, int] = {}  # 区块hash -> height
+        self.__tx_locations: dict[str, tuple[int, int]] = {}  # 交易hash -> (height, 交易在区块内的位置)
+        self.__block_hashes: list[str] = []  # height -> 区块hash(不需要加载已归档的区块)
+        self.__cumulative_difficulty: list[int] = []  # height -> 创世区块至该区块的难度之和
+
+        # 区块上链/回滚时调用的回调(例如API的响应缓存)
+        self.__change_listeners: list[Callable[[], None]] = []
 
     def __len__(self):
         return len(self.__chain)
 
+    def __contains__(self, block_hash: str) -> bool:
+        return block_hash in self.__block_heights
+
     def __iter__(self):
-        return self.__chain.__iter__()
+        for height in range(len(self.__chain)):
+            yield self.__materialize(height)
 
     def __getitem__(self, item):
-        return self.__chain[item]
+        heights = range(len(self.__chain))[item]
+        if isinstance(heights, int):
+            return self.__materialize(heights)
+        return [self.__materialize(h) for h in heights]
 
     def __delitem__(self, key):
-        del self.__chain[key]
+        removed_heights = range(len(self.__chain))[key]
+        if isinstance(removed_heights, int):
+            removed_heights = [removed_heights]
+        if not removed_heights:
+            return
+
+        # 被删除区块之后的所有区块height都会变化, 先全部移出索引, 删除后再重新加入
+        start_height = min(removed_heights)
+        tail = [self.__materialize(h) for h in range(start_height, len(self.__chain))]
+        for height, b in enumerate(tail, start_height):
+            self.__unindex_block(height, b)
+
+        removed = set(removed_heights)
+        kept = [b for height, b in enumerate(tail, start_height) if height not in removed]
+        self.__chain[start_height:] = kept
+        self.__archive_cache.clear()
+        self.__archived_count = min(self.__archived_count, start_height)
+
+        for height, b in enumerate(kept, start_height):
+            self.__index_block(height, b)
+
+        # 存储为追加写入, 截断后重新写入剩余的区块(共识机制回滚时只删除末尾的区块, 无需重新写入)
+        if self.block_store is not None:
+            self.block_store.truncate(start_height)
+            for b in kept:
+                self.block_store.append(b.encoded())
+
+        self.__archive_old_blocks()
+        self.__notify_change()
+
+    def __materialize(self, height: int) -> Block:
+        """
+        获取指定height的区块对象, 已归档的区块从区块存储中加载(经过LRU缓存)
+        """
+        b = self.__chain[height]
+        if b is not None:
+            return b
+
+        b = self.__archive_cache.get(height)
+        if b is None:
+            b = Block.deserialize(self.block_store.read(height), verify_hash=False)
+            if b.prev_hash is None:
+                b.mark_genesis()
+            self.__archive_cache.put(height, b)
+        return b
+
+    def __archive_old_blocks(self):
+        """
+        归档模式下, 释放距离链顶超过archive_depth的区块对象(区块数据已在区块存储中)
+        """
+        if self.archive_depth is None:
+            return
+
+        while self.__archived_count < len(self.__chain) - self.archive_depth:
+            self.__chain[self.__archived_count] = None
+            self.__archived_count += 1
+
+    def add_change_listener(self, listener: Callable[[], None]):
+        """
+        注册区块上链/回滚时的回调
+        """
+        self.__change_listeners.append(listener)
+
+    def __notify_change(self):
+        self.current_node.block_template.notify()
+        for listener in self.__change_listeners:
+            listener()
+
+    @property
+    def archive_cache_info(self) -> dict:
+        return self.__archive_cache.info()
 
     @property
     def pow_difficulty(self) -> int:
@@ -52,10 +154,25 @@ class BlockChain:
         """
         return 1
 
+    @property
+    def hash_encoding(self) -> str:
+        """
+        hash计算时数据的编码方式
+        """
+        return get_hash_encoding()
+
+    @property
+    def tip(self) -> tuple[int, str | None]:
+        """
+        链的tip: (链的长度, tip区块hash)
+        """
+        last_block = self.last_block
+        return len(self.__chain), last_block.hash if last_block else None
+
     @property
     def last_block(self) -> Block | None:
         try:
-            b = self.__chain[-1]
+            b = self[-1]
         except IndexError:
             return None
         else:
@@ -72,16 +189,132 @@ class BlockChain:
     def summary(self) -> "BlockChainSummary":
         return BlockChainSummary(self)
 
+    def __update_balances(self, block: Block, reverse: bool = False):
+        """
+        将区块内的交易应用到余额索引上, reverse为True时撤销(区块回滚)
+
+        对于同一个地址, 支付方的判断优先于接收方(saddr == raddr的交易只扣减余额)
+        """
+        sign = -1 if reverse else 1
+        balances = self.__balances
+        for tx in block.transactions:
+            if tx.saddr is not None:
+                balances[tx.saddr] = balances.get(tx.saddr, 0) - sign * tx.amount
+            if tx.raddr != tx.saddr:
+                balances[tx.raddr] = balances.get(tx.raddr, 0) + sign * tx.amount
+
+    def __index_block(self, height: int, block: Block):
+        self.__update_balances(block)
+        del self.__block_hashes[height:], self.__cumulative_difficulty[height:]
+        self.__block_hashes.append(block.hash)
+        self.__cumulative_difficulty.append(self.__cumulative_difficulty[height - 1] + block.difficulty if height else block.difficulty)
+        self.__block_heights[block.hash] = height
+        for position, tx in enumerate(block.transactions):
+            self.__tx_locations[tx.hash] = (height, position)
+
+    def __unindex_block(self, height: int, block: Block):
+        self.__update_balances(block, reverse=True)
+        del self.__block_hashes[height:], self.__cumulative_difficulty[height:]
+        if self.__block_heights.get(block.hash, None) == height:
+            del self.__block_heights[block.hash]
+        for position, tx in enumerate(block.transactions):
+            if self.__tx_locations.get(tx.hash, None) == (height, position):
+                del self.__tx_locations[tx.hash]
+
+    def get_block_height(self, block_hash: str) -> int | None:
+        return self.__block_heights.get(block_hash, None)
+
+    def get_block_hash(self, height: int) -> str | None:
+        if 0 <= height < len(self.__block_hashes):
+            return self.__block_hashes[height]
+        return None
+
+    @property
+    def total_difficulty(self) -> int:
+        """
+        链的累计难度, 随区块上链/回滚增量维护
+        """
+        return self.__cumulative_difficulty[-1] if self.__cumulative_difficulty else 0
+
+    def checkpoints(self) -> list[list]:
+        """
+        由链顶向前按指数间隔选取的区块: 链顶附近的10个区块逐个选取, 之后间隔每次翻倍, 最后总是包含创世区块
+
+        :return: [[height, 区块hash], ...], 按height从高到低排列, 数量为O(log n)
+        """
+        hashes = self.__block_hashes
+        res = []
+        height, step = len(hashes) - 1, 1
+        while height > 0:
+            res.append([height, hashes[height]])
+            if len(res) >= 10:
+                step *= 2
+            height -= step
+        if hashes:
+            res.append([0, hashes[0]])
+        return res
+
+    def cumulative_difficulty(self, height: int) -> int:
+        """
+        创世区块至height区块的难度之和, height为-1时为0
+        """
+        return self.__cumulative_difficulty[height] if height >= 0 else 0
+
+    def locator(self) -> list[str]:
+        """
+        区块定位器: checkpoints中的区块hash(由高到低), 邻居据此找到两条链的共同区块
+        """
+        return [block_hash for _, block_hash in self.checkpoints()]
+
+    def locate(self, locator: list[str]) -> int:
+        """
+        :return: locator中第一个在本机链上的区块的height, 都不在链上时返回-1
+        """
+        for block_hash in locator:
+            height = self.get_block_height(block_hash)
+            if height is not None:
+                return height
+        return -1
+
+    def get_headers(self, start: int, limit: int) -> list[dict]:
+        """
+        从height为start的区块开始, 最多limit个区块头
+        """
+        return [self[h].serialize_header() for h in range(max(start, 0), min(start + limit, len(self.__chain)))]
+
+    def encoded_range(self, start: int, end: int) -> bytes:
+        """
+        height在[start, end)范围内的区块序列化后的json数据
+        """
+        return b'[' + b', '.join(b.encoded() for b in self[max(start, 0):end]) + b']'
+
+    def get_block_by_hash(self, block_hash: str) -> Block | None:
+        height = self.get_block_height(block_hash)
+        return None if height is None else self[height]
+
+    def get_block_by_height(self, height: int) -> Block | None:
+        if 0 <= height < len(self.__chain):
+            return self[height]
+        return None
+
+    def get_transaction(self, tx_hash: str) -> tuple[Transaction, int, int] | None:
+        """
+        查询链上的交易
+
+        :return: (交易, 区块height, 交易在区块内的位置), 不存在时返回None
+        """
+        location = self.__tx_locations.get(tx_hash, None)
+        if location is None:
+            return None
+
+        height, position = location
+        return self[height].transactions[position], height, position
+
     def compute_balance(self, wallet_addr) -> int:
-        balance = 0
-        for b in self.__chain:
-            for tx in b.transactions:
-                if tx.saddr == wallet_addr:
-                    balance -= tx.amount
-                elif tx.raddr == wallet_addr:
-                    balance += tx.amount
-                else:
-                    continue
+        """
+        查询地址在当前链上的余额, O(1)
+        """
+        balance = self.__balances.get(wallet_addr, 0)
         logger.info(f"计算<addr: {wallet_addr}> 的余额: {balance}")
         return balance
 
@@ -96,18 +329,18 @@ class BlockChain:
         if block.index == 1:
             return True
 
-        reward_tx_num = 0
-        for tx in block.transactions:
-            if tx.saddr is None:
-                reward_tx_num += 1
-
-            if not tx.verify_sign():
-                return False
-
+        reward_tx_num = sum(1 for tx in block.transactions if tx.saddr is None)
         if reward_tx_num != 1:
             return False
 
-        return True
+        return self.current_node.tx_validator.verify_transactions(block.transactions)
+
+    def prevalidate_block_transactions(self, block: Block) -> bool:
+        """
+        在bcl锁外验证区块内交易的签名, 验签通过的交易进入验签缓存, 随后add_block内的验签直接命中缓存,
+        避免在持有bcl锁期间进行耗时的验签
+        """
+        return self.current_node.tx_validator.verify_transactions(block.transactions)
 
     def valid_block_difficulty(self, block: Block) -> bool:
         return block.difficulty == self.pow_difficulty
@@ -162,6 +395,12 @@ class BlockChain:
             logger.error(msg)
             return ExecuteResult(False, ExecuteResultErrorTypes.BLK_INVALID_DATA, msg)
 
+        # 重复区块check
+        if block.hash in self:
+            msg = f"区块{block.hash}已在链上"
+            logger.error(msg)
+            return ExecuteResult(False, ExecuteResultErrorTypes.BLK_REPEAT, msg)
+
         # block validation check
         valid_result: ExecuteResult = self.valid_new_block(block)
         if not valid_result.success:
@@ -182,7 +421,12 @@ class BlockChain:
         # add block & mark tx verified
         # TODO: 这里应该做一下延迟处理，添加了一个块之后，将第n个之前的块内的所有交易标记为“已确认”
         self.__chain.append(block)
+        self.__index_block(len(self.__chain) - 1, block)
+        if self.block_store is not None:
+            self.block_store.append(block.encoded())
+        self.__archive_old_blocks()
         current_txpool.mark_tx(block)
+        self.__notify_change()
         msg = f"区块{block.hash}已上链"
         logger.info(msg)
 
@@ -193,28 +437,79 @@ class BlockChain:
 
         return ExecuteResult(True, None, msg)
 
+    @bcl.func_lock
+    def load_from_store(self) -> int:
+        """
+        从区块存储中恢复区块链并重建索引
+
+        存储中的区块在上链前已经过完整验证, 并由checksum保证数据完整性,
+        因此只检查区块之间的链接关系, 不再重新计算hash、验证交易签名
+
+        :return: 加载的区块数量
+        """
+        if self.block_store is None or self.__chain:
+            return 0
+
+        for height, block_data in enumerate(self.block_store.iter_blocks()):
+            block = Block.deserialize(block_data, verify_hash=False)
+
+            # 只对第一个区块重新计算hash, 用于发现以不同hash编码方式(或旧的区块头格式)写入的数据
+            if height == 0 and not self.valid_block_hash(block):
+                raise BlockStoreHashEncodingMismatchError(
+                    f"区块存储中的区块hash与当前的hash编码方式({self.hash_encoding})或区块头格式不一致: {self.block_store.segment_path}"
+                )
+
+            prev_hash = self.last_block.hash if self.last_block else None
+            if block.prev_hash != prev_hash:
+                logger.error(f"区块存储中height: {height}的区块prev hash不匹配, 丢弃该区块及之后的区块")
+                self.block_store.truncate(height)
+                break
+
+            if block.prev_hash is None:
+                block.mark_genesis()
+            self.__chain.append(block)
+            self.__index_block(height, block)
+            self.__archive_old_blocks()
+
+        logger.info(f"从区块存储中加载区块: {len(self.__chain)}")
+        return len(self.__chain)
+
     def serialize(self) -> list[dict]:
-        return [b.serialize() for b in self.__chain]
+        return [b.serialize() for b in self]
+
+    def encoded(self) -> bytes:
+        """
+        整条链序列化后的json数据, 直接拼接各区块已缓存的编码数据
+        """
+        return b'[' + b', '.join(b.encoded() for b in self) + b']'
 
     def serialize_summary(self) -> dict:
         return self.summary.serialize()
 
 class BlockChainSummary:
-    __slots__ = ['blocks', 'total_length', 'total_difficulty']
+    """
+    区块链摘要, 大小为O(log n):
+        * tip_hash: 链顶区块hash
+        * total_length: 链的长度
+        * total_difficulty: 链的累计难度
+        * checkpoints: 由链顶向前按指数间隔选取的区块, 见BlockChain.checkpoints
+    """
+    __slots__ = ['tip_hash', 'total_length', 'total_difficulty', 'checkpoints']
 
     # 序列化、反序列化时的字段
-    serialized_fields = ('blocks', 'total_length', 'total_difficulty')
+    serialized_fields = ('tip_hash', 'total_length', 'total_difficulty', 'checkpoints')
 
     def __init__(self, bc: BlockChain):
-        self.blocks = [b.summary for b in bc]
-        self.total_length = len(bc)
-        self.total_difficulty = reduce(lambda x, y: x+y, [bs.difficulty for bs in self.blocks]) if self.blocks else 0
+        self.total_length, self.tip_hash = bc.tip
+        self.total_difficulty = bc.total_difficulty
+        self.checkpoints = bc.checkpoints()
 
     def serialize(self):
         return {
-            "blocks": [bs.serialize() for bs in self.blocks],
+            "tip_hash": self.tip_hash,
             "total_length": self.total_length,
-            "total_difficulty": self.total_difficulty
+            "total_difficulty": self.total_difficulty,
+            "checkpoints": self.checkpoints
         }
 
     @classmethod
@@ -234,15 +529,10 @@ class BlockChainSummary:
         bcs = object.__new__(cls)
 
         for f in cls.serialized_fields:
-            fd = data.get(f, None)
-
-            if fd is None:
-                continue
-
-            if f == 'blocks':  # 嵌套数据结构特殊处理，调用对应类的反序列化方法
-                object.__setattr__(bcs, f, [BlockSummary.deserialize(d) for d in fd])
-                continue
+            object.__setattr__(bcs, f, data.get(f, None))
 
-            object.__setattr__(bcs, f, fd)
+        # 旧版本节点的摘要不包含checkpoints
+        if bcs.checkpoints is None:
+            bcs.checkpoints = []
 
         return bcs
@@ -18,35 +18,40 @@ from loguru import logger
 
 # local import
 from .block import Block
+from ..exceptions import DeserializeHashValueCheckError
+
+
+# headers-first同步时, 每次请求的区块头、区块数量(服务端可能返回更少)
+HEADERS_PAGE_SIZE = 2000
+BLOCKS_PAGE_SIZE = 100
 
 
 class POWConsensus:
     def __init__(self, node: Node):
         self.node = node
 
-    def execute_consensus(self, peer_blockchain_data: list[Block]):
+    def execute_consensus(self, fork_point: int, blocks_to_add: list[Block]):
         """
-        执行共识机制算法, 将更权威的链的区块数据补充到自己的链上, 并将拆除的区块内的所有交易信息重新放回交易池中
+        执行共识机制算法, 拆除分叉点之后的本机区块, 补充更权威的链的区块数据, 并将拆除的区块内的所有交易信息重新放回交易池中
+
+        :param fork_point: 分叉点(最后一个相同区块的height, 没有相同区块时为-1)
+        :param blocks_to_add: 分叉点之后的区块(交易签名已验证)
         """
         logger.info("共识机制开始执行")
         current_blockchain: BlockChain = self.node.blockchain
-        fork_print = self._find_fork_point(peer_blockchain_data)
 
         # 分叉拆除
-        blocks_to_remove = current_blockchain[(fork_print + 1):]
+        blocks_to_remove = current_blockchain[(fork_point + 1):]
         if blocks_to_remove:
             logger.info(f"需要拆除区块为: {[b.hash for b in blocks_to_remove]}")
-            # 将分叉点以后的所有交易信息放回交易池
-            for b in blocks_to_remove:
-                for tx in b.transactions:
-                    self.node.txpool.add_transaction(tx)
             # 回滚到分叉点
-            del current_blockchain[(fork_print + 1):]
+            del current_blockchain[(fork_point + 1):]
+            # 将分叉点以后的所有交易信息放回交易池(余额检查基于回滚后的链)
+            self.node.txpool.restore_transactions([tx for b in blocks_to_remove for tx in b.transactions])
         else:
             logger.info("没有需要拆除的区块")
 
         # 新链补充
-        blocks_to_add = peer_blockchain_data[(fork_print + 1):]
         for block in blocks_to_add:
             logger.info(f"来自共识机制的区块: {block.hash} 需要上链")
             if block.prev_hash is None:
@@ -54,42 +59,136 @@ class POWConsensus:
             block.mark_from_peer()
             current_blockchain.add_block(block)
 
-    def _find_fork_point(self, peer_blockchain_data: list[Block]) -> int:
+    def _valid_header(self, header: dict, height: int, prev_hash: str | None) -> bool:
         """
-        找到区块链的彼此分叉点
+        在下载区块之前验证区块头: 位置、prev_hash链接、hash、难度与PoW
         """
-        current_blockchain = self.node.blockchain
-
-        fork_point_index = -1
-        for i in range(min(len(current_blockchain), len(peer_blockchain_data))):
-            if current_blockchain[i].hash != peer_blockchain_data[i].hash:
-                fork_point_index = i - 1
-                break
+        current_blockchain: BlockChain = self.node.blockchain
+        return (
+            header.get('index', None) == height + 1
+            and header.get('prev_hash', None) == prev_hash
+            and header.get('difficulty', None) == current_blockchain.pow_difficulty
+            and Block.compute_header_hash(header) == header.get('hash', None)
+            and header['hash'].startswith(current_blockchain.pow_check)
+        )
+
+    def _sync_headers(self, peer: NetworkNodePeer) -> tuple[int, list[dict]] | None:
+        """
+        headers-first同步的第一步: 以本机链的区块定位器(指数间隔的区块hash)向邻居请求区块头,
+        一次往返即可得到共同区块, 跳过与本机链相同的区块头后得到精确的分叉点, 并逐页验证分叉点之后的区块头
 
-        if fork_point_index == -1:
-            fork_point_index = min(len(current_blockchain), len(peer_blockchain_data)) - 1
+        :return: (分叉点height, 分叉点之后的区块头), 请求失败或区块头验证失败时返回None
+        """
+        current_blockchain: BlockChain = self.node.blockchain
+        peer_client = self.node.peer_client
+
+        locator = current_blockchain.locator()
+        fork_point = None
+        headers: list[dict] = []
+        while True:
+            resp = peer_client.request_headers(peer, locator, HEADERS_PAGE_SIZE)
+            if resp is None:
+                logger.error(f"从邻居节点获取区块头失败: {peer.hash}")
+                return None
+
+            page = resp.get('headers', [])
+            height = resp.get('fork_height', -1) + 1  # page中第一个区块头的height
+            if fork_point is None:
+                fork_point = height - 1
+                if fork_point >= 0 and current_blockchain.get_block_hash(fork_point) not in locator:
+                    logger.error(f"邻居节点返回的共同区块不在本机链上: {fork_point}")
+                    return None
+
+            for header in page:
+                # 与本机链相同的区块头, 分叉点后移
+                if not headers and current_blockchain.get_block_height(header.get('hash', None)) == height:
+                    fork_point = height
+                    height += 1
+                    continue
+
+                prev_hash = headers[-1]['hash'] if headers else current_blockchain.get_block_hash(fork_point)
+                if not self._valid_header(header, height, prev_hash):
+                    logger.error(f"邻居节点的区块头验证失败, height: {height}, hash: {header.get('hash', None)}")
+                    return None
+                headers.append(header)
+                height += 1
+
+            if len(page) < HEADERS_PAGE_SIZE:
+                return fork_point, headers
+            locator = [page[-1]['hash']]
+
+    def _download_blocks(self, peer: NetworkNodePeer, fork_point: int, headers: list[dict]) -> list[Block] | None:
+        """
+        headers-first同步的第二步: 分页下载分叉点之后的区块, 每页下载后立即验证(区块hash与区块头一致、交易签名),
+        验证失败时停止下载
 
-        return fork_point_index
+        :return: 分叉点之后的区块, 下载或验证失败时返回None
+        """
+        peer_client = self.node.peer_client
+        tx_validator = self.node.tx_validator
+
+        blocks: list[Block] = []
+        while len(blocks) < len(headers):
+            start = fork_point + 1 + len(blocks)
+            end = min(start + BLOCKS_PAGE_SIZE, fork_point + 1 + len(headers))
+            page_data = peer_client.request_blocks(peer, start, end)
+            if not page_data:
+                logger.error(f"从邻居节点下载区块失败: {peer.hash}, height: [{start}, {end})")
+                return None
+
+            page: list[Block] = []
+            for bd in page_data[:end - start]:
+                header = headers[len(blocks) + len(page)]
+                try:
+                    b = Block.deserialize(bd)
+                except DeserializeHashValueCheckError as e:
+                    logger.error(f"邻居节点的区块数据验证失败: {e}")
+                    return None
+                if b.hash != header['hash']:
+                    logger.error(f"邻居节点的区块与区块头不一致: {b.hash} != {header['hash']}")
+                    return None
+                if b.prev_hash is None:
+                    b.mark_genesis()
+                page.append(b)
+
+            if not tx_validator.verify_transactions([tx for b in page if not b.is_genesis for tx in b.transactions]):
+                logger.error("新链中存在签名验证未通过的交易, 放弃执行共识机制")
+                return None
+            blocks.extend(page)
+
+        return blocks
 
-    def _get_peer_blockchain(self, peer: NetworkNodePeer) -> list[Block]:
-        blockchain_data_dict = self.node.peer_client.request_block_chain_data(peer)
+    def check_summary(self, bc_summary: BlockChainSummary) -> bool:
+        """
+        累计难度与长度由区块链增量维护, 比较为O(1)
+        """
+        current_blockchain = self.node.blockchain
+        return bc_summary.total_difficulty > current_blockchain.total_difficulty and bc_summary.total_length > len(current_blockchain)
 
-        blockchain_data = []
-        for bd in blockchain_data_dict:
-            b = Block.deserialize(bd)
-            if b.prev_hash is None:
-                b.mark_genesis()
-            blockchain_data.append(b)
+    def sync_from_peer(self, peer: NetworkNodePeer):
+        """
+        headers-first同步: 先同步并验证区块头, 确认邻居链更加权威后, 只下载分叉点之后的区块
+        """
+        res = self._sync_headers(peer)
+        if res is None:
+            return
+        fork_point, headers = res
 
-        return blockchain_data
+        current_blockchain: BlockChain = self.node.blockchain
+        peer_length = fork_point + 1 + len(headers)
+        peer_difficulty = current_blockchain.cumulative_difficulty(fork_point) + sum(h['difficulty'] for h in headers)
+        if peer_length <= len(current_blockchain) or peer_difficulty <= current_blockchain.total_difficulty:
+            logger.info("邻居节点区块头的难度与长度未超过本机BlockChain数据, 跳过共识机制算法")
+            return
 
-    def check_summary(self, bc_summary: BlockChainSummary) -> bool:
-        current_summary = self.node.blockchain.summary
-        return bc_summary.total_difficulty > current_summary.total_difficulty and bc_summary.total_length > current_summary.total_length
+        blocks = self._download_blocks(peer, fork_point, headers)
+        if blocks is None:
+            return
+        self.execute_consensus(fork_point, blocks)
 
     def run(self, bc_summary: BlockChainSummary, peer: NetworkNodePeer):
         if self.check_summary(bc_summary):
             logger.info("检测到BlockChain Summary的难度与长度均大于本机BlockChain数据, 创建执行共识算法的Task")
-            self.execute_consensus(self._get_peer_blockchain(peer))
+            self.sync_from_peer(peer)
         else:
             logger.info("本机BlockChain数据更加权威, 跳过共识机制算法")
@@ -16,6 +16,7 @@ class ExecuteResultErrorTypes:
     TX_SADDR_NONE = 11  # 伪造系统交易
     TX_INSUFFICIENT_BALANCE = 12  # 余额不足
     TX_INVALID_SIGNATURE = 13   # 签名验证失败
+    TX_POOL_FULL = 14  # 交易池已满, 且交易优先级不足以驱逐其他交易
 
     """
     区块验证类
@@ -25,6 +26,7 @@ class ExecuteResultErrorTypes:
     BLK_INVALID_HASH = 22 # 区块的hash验证失败
     BLK_INVALID_PREV_HASH = 23 # 区块的前hash数据验证失败
     BLK_INVALID_DATA = 24 # 区块链的数据结构无效
+    BLK_REPEAT = 25 # 区块重复(已在链上)
 
 
 @dataclass
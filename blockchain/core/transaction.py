@@ -1,10 +1,15 @@
+# std import
+import json
+
 # 3rd import
 from loguru import logger
 
 # local import
 from ..exceptions import DeserializeHashValueCheckError
-from ..tools.hash_tools import compute_hash
+from ..tools.hash_tools import compute_hash, compute_binary_hash, get_hash_encoding
+from ..tools.binary_encoding import TX_CORE_SCHEMA
 from ..tools.ecdsa_sign_tools import ECDSATool
+from ..tools.lru_cache import LRUCache
 
 
 class Transaction:
@@ -13,15 +18,21 @@ class Transaction:
     """
     __slots__ = [
         'saddr', 'raddr', 'amount', 'timestamp', 'hash', 'signature',
-        '_runtime_is_confirmed', '_runtime_is_from_peer'
+        '_runtime_is_confirmed', '_runtime_is_from_peer',
+        '_runtime_serialized', '_runtime_encoded'
     ]
     frozen_fields = (
         'saddr', 'raddr', 'amount', 'timestamp', 'hash',
-        '_runtime_is_confirmed', '_runtime_is_from_peer'
+        '_runtime_is_confirmed', '_runtime_is_from_peer',
+        '_runtime_serialized', '_runtime_encoded'
     )
     # 序列化、反序列化时的字段
     serialized_fields = ('saddr', 'raddr', 'amount', 'timestamp', 'hash', 'signature',)
 
+    # 已通过验签的 (hash, signature), 交易池与区块链共用
+    # 同一笔交易进入交易池、随区块上链、被peer重复广播、共识回放时只需验签一次
+    verified_sign_cache = LRUCache(65536)
+
     def __init__(self, saddr: str | None, raddr: str, amount: int, timestamp: int):
         ## core data
         object.__setattr__(self, 'saddr', saddr)  # sender public key, None is miner reward
@@ -31,7 +42,7 @@ class Transaction:
 
         ## hash & signature
         object.__setattr__(self, 'hash', self.compute_hash())
-        self.signature = None
+        object.__setattr__(self, 'signature', None)
 
         self.__init_system_fields()
 
@@ -40,6 +51,16 @@ class Transaction:
         object.__setattr__(self, '_runtime_is_confirmed', False)
         object.__setattr__(self, '_runtime_is_from_peer', False)
 
+        ## 序列化缓存
+        self.__clear_serialize_cache()
+
+    def __clear_serialize_cache(self):
+        """
+        除signature外的字段均不可修改, 序列化结果只在签名时失效
+        """
+        object.__setattr__(self, '_runtime_serialized', None)
+        object.__setattr__(self, '_runtime_encoded', None)
+
     @property
     def is_confirmed(self) -> bool:
         return self._runtime_is_confirmed
@@ -70,6 +91,8 @@ class Transaction:
             raise AttributeError(f'key {key} is frozen')
 
         super().__setattr__(key, value)
+        if key == 'signature':
+            self.__clear_serialize_cache()
 
     def __delattr__(self, item):
         if item in self.frozen_fields:
@@ -91,6 +114,8 @@ class Transaction:
         }
 
     def compute_hash(self) -> str:
+        if get_hash_encoding() == 'binary':
+            return compute_binary_hash(TX_CORE_SCHEMA, self)
         return compute_hash(self.tx_core_data())
 
     def sign(self, sec_key: str):
@@ -104,6 +129,7 @@ class Transaction:
         ecdsa_tool = ECDSATool(secret_key=sec_key)
 
         object.__setattr__(self, 'signature', ecdsa_tool.sign_data(self.hash.encode()))
+        self.__clear_serialize_cache()
 
     def verify_sign(self) -> bool:
         """
@@ -112,27 +138,35 @@ class Transaction:
         """
         logger.info(f"验证交易: {self.hash}")
         if self.saddr is None:
-            logger.info(f"验证交易: {self.serialize()}通过, 系统奖励")
+            logger.info(f"验证交易: {self.hash}通过, 系统奖励")
             return True
 
         if self.signature is None:
-            logger.error(f"验证交易: {self.serialize()}失败, 签名字段为空")
+            logger.error(f"验证交易: {self.hash}失败, 签名字段为空")
             return False
 
+        # hash由交易核心数据计算得出(反序列化时已校验), 签名又是对hash的签名, 因此(hash, signature)可以唯一确定验签结果
+        cache_key = (self.hash, self.signature)
+        if self.verified_sign_cache.get(cache_key):
+            logger.info(f"验证交易: {self.hash}成功, 命中验签缓存")
+            return True
+
         ecdsa_tool = ECDSATool(public_key=self.saddr)
         verify_result = ecdsa_tool.verify_sign_data(self.signature, self.hash.encode())
         if not verify_result:
-            logger.error(f"验证交易: {self.serialize()}失败, 签名验证未通过")
+            logger.error(f"验证交易: {self.hash}失败, 签名验证未通过")
         else:
-            logger.info(f"验证交易: {self.serialize()}成功")
+            self.verified_sign_cache.put(cache_key, True)
+            logger.info(f"验证交易: {self.hash}成功")
         return verify_result
 
     @classmethod
-    def deserialize(cls, data: dict | None) -> "Transaction | None":
+    def deserialize(cls, data: dict | None, verify_hash: bool = True) -> "Transaction | None":
         """
         从dict加载数据，同时进行验证
 
         :param data:
+        :param verify_hash: 是否重新计算hash并与数据中的hash比对, 只有加载本地已验证过的数据时才可以跳过
         :return:
         """
         if data is None:
@@ -145,8 +179,8 @@ class Transaction:
             object.__setattr__(t, f, data.get(f, None))
 
         # hash一致性检查
-        computed_hash = t.compute_hash()
         data_hash = data.get('hash', None)
+        computed_hash = t.compute_hash() if verify_hash else data_hash
         if computed_hash == data_hash:
             object.__setattr__(t, 'hash', computed_hash)
         else:
@@ -156,8 +190,23 @@ class Transaction:
         return t
 
     def serialize(self) -> dict:
+        """
+        序列化结果会被缓存, 调用方不可修改返回的dict
+        """
+        if self._runtime_serialized is not None:
+            return self._runtime_serialized
+
         d = {}
         for f in self.serialized_fields:
             d[f] = getattr(self, f)
 
+        object.__setattr__(self, '_runtime_serialized', d)
         return d
+
+    def encoded(self) -> bytes:
+        """
+        序列化后的json数据(缓存), 用于网络传输与存储
+        """
+        if self._runtime_encoded is None:
+            object.__setattr__(self, '_runtime_encoded', json.dumps(self.serialize(), sort_keys=True).encode())
+        return self._runtime_encoded
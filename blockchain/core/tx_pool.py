@@ -7,8 +7,9 @@ if TYPE_CHECKING:
     from ..types.network_types import PeerClient
 
 # std import
-import json
+import heapq
 from time import time
+from collections import OrderedDict
 
 # 3rd import
 from loguru import logger
@@ -23,51 +24,233 @@ txl = Lock()
 
 
 class TransactionPool:
-    def __init__(self, current_node: Node):
+    def __init__(
+            self, current_node: Node,
+            max_txs: int | None = None, max_bytes: int | None = None, max_block_txs: int | None = None
+        ):
+        """
+        :param max_txs: 交易池最多容纳的交易数量, None为不限制
+        :param max_bytes: 交易池最多容纳的交易数据大小(序列化后的字节数), None为不限制
+        :param max_block_txs: 每个区块最多打包的交易数量(不含矿工奖励交易), None为不限制
+        """
         self.current_node = current_node
         self.tq: TaskQueue = self.current_node.task_queue
         self.peer_client: PeerClient = self.current_node.peer_client
 
-        # core
-        self.__transactions: list[Transaction] = []
+        self.max_txs = max_txs
+        self.max_bytes = max_bytes
+        self.max_block_txs = max_block_txs
+
+        # core: 交易hash -> 交易, 保持进入交易池的顺序
+        self.__transactions: OrderedDict[str, Transaction] = OrderedDict()
+
+        # index: 交易池中已确认(等待clear移除)的交易hash
+        self.__confirmed_hashes: set[str] = set()
+
+        # 待确认支出账本: 支付方地址 -> 交易池中该地址未确认交易的总支出
+        self.__pending_outflows: dict[str, int] = {}
+
+        # 优先级: 交易hash -> 进入交易池的序号(越小越早), 交易hash -> 数据大小
+        self.__seq = 0
+        self.__tx_seqs: dict[str, int] = {}
+        self.__tx_sizes: dict[str, int] = {}
+        self.__total_bytes = 0
+
+        # 优先级堆(惰性删除, 堆中的条目在交易被移除后作废):
+        #   * best heap: (-fee, seq, hash), 堆顶为优先级最高的交易, 用于选取挖矿数据
+        #   * worst heap: (fee, -seq, hash), 堆顶为优先级最低的交易, 用于交易池满时驱逐
+        self.__best_heap: list[tuple[int, int, str]] = []
+        self.__worst_heap: list[tuple[int, int, str]] = []
 
     def __len__(self):
         return len(self.__transactions)
 
+    def __contains__(self, tx_hash: str) -> bool:
+        return tx_hash in self.__transactions
+
+    def get(self, tx_hash: str) -> Transaction | None:
+        return self.__transactions.get(tx_hash, None)
+
     def get_all_txs_hash(self) -> list:
-        return [tx.hash for tx in self.__transactions]
+        return list(self.__transactions.keys())
+
+    @property
+    def total_bytes(self) -> int:
+        return self.__total_bytes
+
+    def get_pending_outflow(self, saddr: str) -> int:
+        """
+        地址在交易池中未确认交易的总支出
+        """
+        return self.__pending_outflows.get(saddr, 0)
+
+    def __add_pending_outflow(self, transaction: Transaction):
+        if transaction.saddr is None:
+            return
+        self.__pending_outflows[transaction.saddr] = self.get_pending_outflow(transaction.saddr) + transaction.amount
+
+    def __remove_pending_outflow(self, transaction: Transaction):
+        if transaction.saddr is None:
+            return
+        outflow = self.get_pending_outflow(transaction.saddr) - transaction.amount
+        if outflow > 0:
+            self.__pending_outflows[transaction.saddr] = outflow
+        else:
+            self.__pending_outflows.pop(transaction.saddr, None)
+
+    ################################################
+    # 优先级与容量
+    ################################################
+
+    @staticmethod
+    def tx_fee(transaction: Transaction) -> int:
+        """
+        交易手续费, 交易暂不包含手续费字段时为0, 此时优先级退化为进入交易池的先后顺序
+        """
+        return getattr(transaction, 'fee', 0)
+
+    def tx_size(self, transaction: Transaction) -> int:
+        """
+        交易数据大小, 只有限制了交易池大小时才需要计算
+        """
+        if self.max_bytes is None:
+            return 0
+        return len(transaction.encoded())
+
+    def __is_entry_valid(self, seq: int, tx_hash: str) -> bool:
+        return self.__tx_seqs.get(tx_hash, None) == seq and tx_hash not in self.__confirmed_hashes
+
+    def __is_full(self, extra_txs: int, extra_bytes: int) -> bool:
+        if self.max_txs is not None and len(self.__transactions) + extra_txs > self.max_txs:
+            return True
+        if self.max_bytes is not None and self.__total_bytes + extra_bytes > self.max_bytes:
+            return True
+        return False
+
+    def __make_room(self, transaction: Transaction, size: int) -> bool:
+        """
+        交易池已满时, 驱逐优先级低于新交易的交易, 直到可以放入新交易
+
+        :return: 是否可以放入新交易
+        """
+        if not self.__is_full(1, size):
+            return True
+
+        self.__clear_confirmed()
+
+        # 先确定需要驱逐的交易, 只有全部都比新交易优先级低时才执行驱逐
+        new_key = (-self.tx_fee(transaction), self.__seq)
+        candidates, candidate_hashes = [], set()
+        freed_txs, freed_bytes = 0, 0
+        while self.__is_full(1 - freed_txs, size - freed_bytes) and self.__worst_heap:
+            entry = heapq.heappop(self.__worst_heap)
+            fee, neg_seq, tx_hash = entry
+            if not self.__is_entry_valid(-neg_seq, tx_hash) or tx_hash in candidate_hashes:
+                continue
+
+            candidates.append(entry)
+            candidate_hashes.add(tx_hash)
+            if (-fee, -neg_seq) <= new_key:  # 交易池中最差的交易也不比新交易差
+                break
+            freed_txs += 1
+            freed_bytes += self.__tx_sizes[tx_hash]
+
+        if self.__is_full(1 - freed_txs, size - freed_bytes):
+            for entry in candidates:
+                heapq.heappush(self.__worst_heap, entry)
+            return False
+
+        for _, _, tx_hash in candidates:
+            logger.info(f"交易池已满, 驱逐低优先级交易: {tx_hash}")
+            self.__remove(tx_hash)
+        return True
+
+    def __insert(self, transaction: Transaction, size: int):
+        tx_hash = transaction.hash
+        seq = self.__seq
+        self.__seq += 1
+
+        self.__transactions[tx_hash] = transaction
+        self.__tx_seqs[tx_hash] = seq
+        self.__tx_sizes[tx_hash] = size
+        self.__total_bytes += size
+        self.__add_pending_outflow(transaction)
+
+        fee = self.tx_fee(transaction)
+        heapq.heappush(self.__best_heap, (-fee, seq, tx_hash))
+        heapq.heappush(self.__worst_heap, (fee, -seq, tx_hash))
+        self.__compact_heaps()
+
+    def __remove(self, tx_hash: str):
+        transaction = self.__transactions.pop(tx_hash, None)
+        if transaction is None:
+            return
+
+        self.__tx_seqs.pop(tx_hash, None)
+        self.__total_bytes -= self.__tx_sizes.pop(tx_hash, 0)
+        if tx_hash in self.__confirmed_hashes:
+            self.__confirmed_hashes.discard(tx_hash)
+        else:
+            self.__remove_pending_outflow(transaction)
+
+    def __compact_heaps(self):
+        """
+        堆中作废条目过多时重建堆
+        """
+        if len(self.__best_heap) <= 2 * len(self.__transactions) + 1024:
+            return
+
+        self.__best_heap = [(-self.tx_fee(t), self.__tx_seqs[h], h) for h, t in self.__transactions.items()]
+        self.__worst_heap = [(-fee, -seq, h) for fee, seq, h in self.__best_heap]
+        heapq.heapify(self.__best_heap)
+        heapq.heapify(self.__worst_heap)
+
+    ################################################
+    # 交易池操作
+    ################################################
 
     @txl.func_lock
     def add_transaction(self, transaction: Transaction) -> ExecuteResult:
         # 交易重复检查
-        all_txs_hash = self.get_all_txs_hash()
-        if transaction.hash in all_txs_hash:
-            msg = f"交易重复, 交易信息已丢弃: {transaction.serialize()}"
+        if transaction.hash in self.__transactions:
+            msg = f"交易重复, 交易已丢弃: {transaction.hash}"
             logger.error(msg)
             return ExecuteResult(success=False, error_type=ExecuteResultErrorTypes.TX_REPEAT, message=msg)
 
         # 支付方为None的情况只有空投奖励,这里只接受其他节点同步过来的数据
         if (transaction.saddr is None) and (not transaction.is_from_peer):
-            msg = f"伪造系统奖励，交易信息已丢弃: {transaction.serialize()}"
+            msg = f"伪造系统奖励，交易已丢弃: {transaction.hash}"
             logger.error(msg)
             return ExecuteResult(success=False, error_type=ExecuteResultErrorTypes.TX_SADDR_NONE, message=msg)
 
-        # 余额check(系统奖励不进行check)
+        # 余额check(系统奖励不进行check), 需扣除交易池中尚未确认的支出, 防止双花
         if transaction.saddr is not None:
             balance = self.current_node.blockchain.compute_balance(transaction.saddr)
-            if transaction.amount > balance:
-                msg = f'{transaction.saddr}的链上余额: {balance}, 无法完成本次交易: {transaction.serialize()}'
+            pending_outflow = self.get_pending_outflow(transaction.saddr)
+            if transaction.amount + pending_outflow > balance:
+                msg = (
+                    f'{transaction.saddr}的链上余额: {balance}, 待确认支出: {pending_outflow}, '
+                    f'无法完成本次交易: {transaction.hash}'
+                )
                 logger.error(msg)
                 return ExecuteResult(False, ExecuteResultErrorTypes.TX_INSUFFICIENT_BALANCE, msg)
 
         # 交易签名check
         if not transaction.verify_sign():
-            msg = f'交易签名校验失败, 交易信息: {transaction.serialize()}'
+            msg = f'交易签名校验失败, 交易: {transaction.hash}'
             logger.error(msg)
             return ExecuteResult(False, ExecuteResultErrorTypes.TX_INVALID_SIGNATURE, msg)
 
-        self.__transactions.append(transaction)
-        msg = f"交易信息已进入本机交易池, 交易信息: {transaction.serialize()}"
+        # 容量check, 交易池已满时驱逐低优先级交易
+        size = self.tx_size(transaction)
+        if not self.__make_room(transaction, size):
+            msg = f'交易池已满, 交易优先级过低, 交易信息已丢弃: {transaction.hash}'
+            logger.error(msg)
+            return ExecuteResult(False, ExecuteResultErrorTypes.TX_POOL_FULL, msg)
+
+        self.__insert(transaction, size)
+        self.current_node.block_template.notify()
+        msg = f"交易已进入本机交易池: {transaction.hash}"
         if not transaction.is_from_peer:  # 广播交易
             self.tq.put(self.peer_client.broadcast_tx, transaction)
             logger.info(f"交易{transaction.hash}广播任务已进入任务队列")
@@ -76,21 +259,79 @@ class TransactionPool:
     @txl.func_lock
     def mark_tx(self, block: Block):
         """
-        标记区块数据中的交易已确认
+        标记区块数据中的交易已确认, O(区块交易数量)
+        """
+        for block_tx in block.transactions:
+            t = self.__transactions.get(block_tx.hash, None)
+            if t is None or t.hash in self.__confirmed_hashes:
+                continue
+
+            t.mark_confirmed()
+            self.__confirmed_hashes.add(t.hash)
+            self.__remove_pending_outflow(t)
+
+    @txl.func_lock
+    def restore_transactions(self, transactions: list[Transaction]):
+        """
+        共识机制回滚区块后, 将被拆除区块内的交易重新放回交易池:
+            1. 仍在交易池中的已确认交易: 恢复为未确认
+            2. 不在交易池中的交易: 按新交易重新检查(余额基于回滚后的链)
+        系统奖励交易随区块一起作废, 不放回交易池
         """
-        all_confirmed_tx_hashes: list[str] = [t.hash for t in block.transactions]
-        for t in self.__transactions:
-            if t.hash in all_confirmed_tx_hashes:
-                t.mark_confirmed()
+        for tx in transactions:
+            if tx.saddr is None:
+                continue
+
+            pool_tx = self.__transactions.get(tx.hash, None)
+            if pool_tx is None:
+                self.add_transaction(tx)
+            elif pool_tx.hash in self.__confirmed_hashes:
+                pool_tx.mark_unconfirmed()
+                self.__confirmed_hashes.discard(pool_tx.hash)
+                self.__add_pending_outflow(pool_tx)
+                # 恢复的交易需要重新进入优先级堆
+                fee, seq = self.tx_fee(pool_tx), self.__tx_seqs[pool_tx.hash]
+                heapq.heappush(self.__best_heap, (-fee, seq, pool_tx.hash))
+                heapq.heappush(self.__worst_heap, (fee, -seq, pool_tx.hash))
+
+        self.current_node.block_template.notify()
+
+    def __clear_confirmed(self):
+        for tx_hash in list(self.__confirmed_hashes):
+            self.__remove(tx_hash)
 
     @txl.func_lock
     def clear(self):
         """
-        清除交易池中已确认的交易
+        清除交易池中已确认的交易, O(已确认交易数量)
+        """
+        self.__clear_confirmed()
+
+    @txl.func_lock
+    def select_transactions(self, limit: int | None) -> list[Transaction]:
+        """
+        按优先级选取交易池中未确认的交易, O(limit * log(交易池大小))
+
+        :param limit: 选取数量, None为全部选取(按进入交易池的顺序)
         """
-        not_confirmed_txs = [t for t in self.__transactions if not t.is_confirmed]
-        del self.__transactions
-        self.__transactions = not_confirmed_txs
+        if limit is None or limit >= len(self.__transactions) - len(self.__confirmed_hashes):
+            return [t for h, t in self.__transactions.items() if h not in self.__confirmed_hashes]
+
+        selected, popped, selected_hashes = [], [], set()
+        while self.__best_heap and len(selected) < limit:
+            entry = heapq.heappop(self.__best_heap)
+            _, seq, tx_hash = entry
+            if not self.__is_entry_valid(seq, tx_hash) or tx_hash in selected_hashes:
+                continue  # 作废/重复的条目直接丢弃
+
+            selected.append(self.__transactions[tx_hash])
+            selected_hashes.add(tx_hash)
+            popped.append(entry)
+
+        for entry in popped:
+            heapq.heappush(self.__best_heap, entry)
+
+        return selected
 
     def get_mining_data(self, miner_addr) -> tuple[Transaction, ...]:
         self.clear()
@@ -106,7 +347,7 @@ class TransactionPool:
             timestamp=int(time())
         )
 
-        return tuple(self.__transactions + [reward_tx])
+        return (*self.select_transactions(self.max_block_txs), reward_tx)
 
     @txl.func_lock
     def get_prize(self, raddr: str, amount: int) -> ExecuteResult:
@@ -119,11 +360,18 @@ class TransactionPool:
             amount=amount,
             timestamp=int(time()),
         )
-        self.__transactions.append(prize_tx)
+        size = self.tx_size(prize_tx)
+        if not self.__make_room(prize_tx, size):
+            msg = f'交易池已满, 无法放入空投奖励: {prize_tx.hash}'
+            logger.error(msg)
+            return ExecuteResult(False, ExecuteResultErrorTypes.TX_POOL_FULL, msg)
+
+        self.__insert(prize_tx, size)
+        self.current_node.block_template.notify()
 
         # 广播这条奖励
         self.tq.put(self.peer_client.broadcast_tx, prize_tx)
         return ExecuteResult(True, None, None)
 
     def to_json(self) -> str:
-        return json.dumps([tx.serialize() for tx in self.__transactions], sort_keys=True)
+        return '[' + ', '.join(tx.encoded().decode() for tx in self.__transactions.values()) + ']'
@@ -0,0 +1,152 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : tx_validator.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/10 19:40
+# 交易签名的并行验证
+#
+# ecdsa为纯python实现, 验签期间一直持有GIL, 多线程无法并行, 因此将验签分发到进程池中执行,
+# 任意一笔交易验签失败后通知所有进程停止, 验签通过的交易写入Transaction.verified_sign_cache
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Iterable
+
+# std import
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# 3rd import
+from loguru import logger
+
+# local import
+from .transaction import Transaction
+from ..tools.ecdsa_sign_tools import ECDSATool
+
+
+__all__ = ['ParallelTransactionValidator']
+
+
+_worker_stop_event = None
+
+
+def _init_validate_worker(stop_event):
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+
+def _verify_chunk(items: list[tuple[str, str, str]]) -> bool:
+    """
+    在worker进程中验证一批交易签名
+
+    :param items: [(saddr, signature, hash), ...]
+    :return: 全部通过返回True, 任意一笔失败(或被通知停止)返回False
+    """
+    for saddr, signature, tx_hash in items:
+        if _worker_stop_event.is_set():
+            return False
+
+        try:
+            valid = ECDSATool(public_key=saddr).verify_sign_data(signature, tx_hash.encode())
+        except Exception:  # 公钥或签名格式错误
+            valid = False
+
+        if not valid:
+            _worker_stop_event.set()
+            return False
+
+    return True
+
+
+class ParallelTransactionValidator:
+    """
+    交易签名验证引擎, workers <= 1 或待验证交易数量较少时直接在当前线程中串行验证
+    """
+    def __init__(self, workers: int = 1, min_parallel_txs: int = 64, chunks_per_worker: int = 4):
+        """
+        :param workers: 验签进程数量
+        :param min_parallel_txs: 待验证(未命中验签缓存)的交易数量达到此值时才使用进程池
+        :param chunks_per_worker: 每个进程分配的批次数量, 批次越小失败时停止得越快
+        """
+        self.workers = workers
+        self.min_parallel_txs = min_parallel_txs
+        self.chunks_per_worker = chunks_per_worker
+
+        # 使用spawn启动worker, 避免fork时复制其他线程持有的锁
+        self._mp_context = multiprocessing.get_context('spawn')
+        self._stop_event = self._mp_context.Event()
+        self._executor: ProcessPoolExecutor | None = None
+        # stop_event被所有worker共享, 同一时间只执行一次并行验证
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._mp_context,
+                initializer=_init_validate_worker,
+                initargs=(self._stop_event,)
+            )
+        return self._executor
+
+    def verify_transactions(self, txs: Iterable[Transaction]) -> bool:
+        """
+        验证一组交易的签名, 系统奖励交易与已命中验签缓存的交易会被跳过
+
+        :return: 全部通过返回True
+        """
+        pending = []
+        for tx in txs:
+            if tx.saddr is None:
+                continue
+            if tx.signature is None:
+                logger.error(f"验证交易: {tx.hash}失败, 签名字段为空")
+                return False
+            if (tx.hash, tx.signature) not in Transaction.verified_sign_cache:
+                pending.append(tx)
+
+        if self.workers <= 1 or len(pending) < self.min_parallel_txs:
+            return all(tx.verify_sign() for tx in pending)
+
+        logger.info(f"并行验证{len(pending)}笔交易的签名, 进程数量: {self.workers}")
+        if not self._verify_parallel(pending):
+            logger.error("并行验签失败, 存在签名验证未通过的交易")
+            return False
+
+        for tx in pending:
+            Transaction.verified_sign_cache.put((tx.hash, tx.signature), True)
+        return True
+
+    def _verify_parallel(self, txs: list[Transaction]) -> bool:
+        items = [(tx.saddr, tx.signature, tx.hash) for tx in txs]
+        chunk_num = self.workers * self.chunks_per_worker
+        chunk_size = -(-len(items) // chunk_num)
+
+        with self._lock:
+            executor = self._get_executor()
+            self._stop_event.clear()
+            futures = {
+                executor.submit(_verify_chunk, items[i:i + chunk_size])
+                for i in range(0, len(items), chunk_size)
+            }
+
+            try:
+                while futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    if not all(f.result() for f in done):
+                        return False
+                return True
+            finally:
+                # 短路: 取消尚未开始的批次, 正在执行的批次会在下一笔交易前检查到stop_event
+                self._stop_event.set()
+                for f in futures:
+                    f.cancel()
+                wait(futures)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
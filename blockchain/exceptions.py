@@ -11,6 +11,13 @@ class DeserializeHashValueCheckError(Exception):
     """
     pass
 
+
+class BlockStoreHashEncodingMismatchError(Exception):
+    """
+    区块存储中的数据与当前链参数的hash编码方式不一致
+    """
+    pass
+
 # network
 class PeerClientProtocolError(Exception):
     """
@@ -26,6 +33,20 @@ class PeerClientAdapterProtocolError(Exception):
     pass
 
 
+class PeerClientAdapterDependencyError(Exception):
+    """
+    Adapter依赖的可选第三方库未安装
+    """
+    pass
+
+
+class TCPProtocolError(Exception):
+    """
+    tcp协议的消息帧不符合协议(过大、连接中断、未知的消息类型)
+    """
+    pass
+
+
 # Testing Nexus
 class TestingNexusAddrNotSpecifiedError(Exception):
     """
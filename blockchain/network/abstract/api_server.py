@@ -84,6 +84,27 @@ class API(ABC):
         """
         pass
 
+    @abstractmethod
+    def _api_get_headers(self):
+        """
+        根据区块定位器返回两条链的共同区块及其之后的区块头(headers-first同步)
+        """
+        pass
+
+    @abstractmethod
+    def _api_get_blocks(self):
+        """
+        按height范围下载区块
+        """
+        pass
+
+    @abstractmethod
+    def _api_chain_params(self):
+        """
+        链参数(难度、奖励、hash编码方式), 钱包与矿工需要与node保持一致
+        """
+        pass
+
     @abstractmethod
     def _api_add_block(self):
         """
@@ -97,6 +118,34 @@ class API(ABC):
         """
         pass
 
+    @abstractmethod
+    def _api_get_block(self, block_hash):
+        """
+        根据hash获取区块数据
+        """
+        pass
+
+    @abstractmethod
+    def _api_get_block_by_height(self, height):
+        """
+        根据height获取区块数据
+        """
+        pass
+
+    @abstractmethod
+    def _api_get_transaction(self, tx_hash):
+        """
+        根据hash获取链上的交易数据及其所在位置
+        """
+        pass
+
+    @abstractmethod
+    def _api_get_transaction_proof(self, tx_hash):
+        """
+        获取链上交易的merkle包含证明(供轻节点验证)
+        """
+        pass
+
     ################################################
     # Mining API
     ################################################
@@ -115,6 +164,20 @@ class API(ABC):
         """
         pass
 
+    @abstractmethod
+    def _api_mining_template(self, miner_addr):
+        """
+        申请带版本的挖矿区块模板
+        """
+        pass
+
+    @abstractmethod
+    def _api_mining_template_state(self):
+        """
+        获取挖矿区块模板的版本状态(支持长轮询), 矿工据此判断模板是否过期
+        """
+        pass
+
     ################################################
     # user & transaction API
     ################################################
@@ -55,6 +55,20 @@ class PeerClientAdapter(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_headers(self, peer: NetworkNodePeer, locator: list[str], limit: int) -> dict | None:
+        """
+        以区块定位器向邻居请求分叉点之后的区块头
+        """
+        pass
+
+    @abstractmethod
+    def get_blocks(self, peer: NetworkNodePeer, start: int, end: int) -> list[dict] | None:
+        """
+        获取邻居链上height在[start, end)范围内的区块数据
+        """
+        pass
+
     @abstractmethod
     def join_network(self, peer: NetworkNodePeer, self_peer_info: NetworkNodePeer):
         """
@@ -0,0 +1,130 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : async_peer_client.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/14 21:10
+# 基于asyncio的PeerClient
+#
+# 广播与链摘要轮询在AsyncPeerClientAdapter的事件循环中并发执行, 不再为每个邻居占用一个线程,
+# 适合维护大量邻居的节点; 其余请求(加入网络、共识同步)与PeerClient相同, 经过adapter的同步方法
+# tcp邻居没有协程方法, 其同步方法在事件循环的线程池中执行
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ...types.role_types import TaskQueue
+    from ...types.network_types import PeerClientAdapter
+    from ...types.core_types import Transaction, Block, POWConsensus
+
+# std import
+import asyncio
+from time import perf_counter
+
+# 3rd import
+from loguru import logger
+
+# local import
+from .peer import NetworkNodePeer
+from .peer_client import PeerClient
+from ..http.async_http_peer_client_adapter import AsyncPeerClientAdapter
+from ..tcp.tcp_peer_client_adapter import TCPPeerClientAdapter
+from ...exceptions import PeerClientAdapterProtocolError
+from ...core.blockchain import BlockChainSummary
+
+
+__all__ = ['AsyncPeerClient']
+
+
+class AsyncPeerClient(PeerClient):
+    def __init__(self, broadcast_timeout: float = 15, max_connections: int = 512):
+        """
+        :param broadcast_timeout: 等待一次广播(或一轮链摘要轮询)完成的最长时间(秒)
+        :param max_connections: 事件循环中与所有邻居之间的最大连接数
+        """
+        super().__init__(broadcast_timeout=broadcast_timeout)
+        self.adapters: dict[str, PeerClientAdapter] = {
+            'http': AsyncPeerClientAdapter(max_connections=max_connections),
+            'tcp': TCPPeerClientAdapter()
+        }
+
+    def get_adapter(self, protocol: str) -> PeerClientAdapter:
+        res = self.adapters.get(protocol, None)
+
+        if res is None:
+            raise PeerClientAdapterProtocolError(f"Not Found Adapter, protocol: {protocol}")
+        else:
+            return res
+
+    def _other_peers(self) -> list[NetworkNodePeer]:
+        return [peer for peer in self.current_peers if peer.hash != self.node.self_peer_hash]
+
+    async def _timed_request_async(self, method_name: str, peer: NetworkNodePeer, *args):
+        """
+        在事件循环中向单个邻居发送请求, 记录请求延迟, 请求失败时只记录日志并返回None
+        """
+        start = perf_counter()
+        success = False
+        try:
+            adapter = self.get_adapter(peer.protocol)
+            if hasattr(adapter, method_name):
+                res = await getattr(adapter, method_name)(peer, *args)
+            else:
+                sync_method = getattr(adapter, method_name.removesuffix('_async'))
+                res = await asyncio.get_running_loop().run_in_executor(None, sync_method, peer, *args)
+            success = True
+            return res
+        except Exception as e:
+            logger.error(f"请求邻居节点{peer.addr}失败({method_name}): {e}")
+        finally:
+            self.latency_metrics.record(peer.hash, perf_counter() - start, success)
+
+    def _fan_out(self, method_name: str, peers: list[NetworkNodePeer], *args) -> list:
+        """
+        在事件循环中并发地向peers发送请求, 阻塞至全部完成或超时
+
+        :return: 与peers一一对应的请求结果(失败或超时为None)
+        """
+        if not peers:
+            return []
+
+        async def gather():
+            tasks = [asyncio.ensure_future(self._timed_request_async(method_name, peer, *args)) for peer in peers]
+            done, pending = await asyncio.wait(tasks, timeout=self.broadcast_timeout)
+            for task in pending:
+                task.cancel()
+            return [t.result() if t in done else None for t in tasks]
+
+        adapter: AsyncPeerClientAdapter = self.adapters['http']
+        results = adapter.run(gather())
+        for peer, res in zip(peers, results):
+            if res is None:
+                logger.warning(f"邻居节点{peer.addr}请求失败或超时({method_name})")
+        return results
+
+    def broadcast_block(self, block: Block):
+        self._fan_out('send_block_async', self._other_peers(), block)
+
+    def broadcast_tx(self, tx: Transaction):
+        self._fan_out('send_tx_async', self._other_peers(), tx)
+
+    def broadcast_peer(self, send_peer: NetworkNodePeer):
+        self._fan_out('send_peer_async', self._other_peers(), send_peer)
+
+    def polling_blockchain_summary(self):
+        """
+        并发地轮询所有邻居节点的区块链摘要信息, 并交给共识组件进行处理
+        """
+        tq: TaskQueue = self.node.task_queue
+        cons: POWConsensus = self.node.consensus
+
+        peers = self._other_peers()
+        for peer, bc_summary_data in zip(peers, self._fan_out('get_blockchain_summary_async', peers)):
+            if bc_summary_data is None:
+                continue
+
+            tq.put(cons.run, BlockChainSummary.deserialize(bc_summary_data), peer)
+            logger.info(f"新增共识检查Task, 节点对象: {peer.hash}")
+
+    def close(self):
+        self.adapters['http'].close()
@@ -2,11 +2,12 @@
 from loguru import logger
 
 # local import
-from ...tools.hash_tools import compute_hash
+from ...tools.hash_tools import compute_hash, compute_binary_hash, get_hash_encoding
+from ...tools.binary_encoding import PEER_CORE_SCHEMA
 from ...exceptions import PeerClientProtocolError
 from ...exceptions import DeserializeHashValueCheckError
 
-all_peer_protocol = ('http',)
+all_peer_protocol = ('http', 'tcp')
 
 
 class NetworkNodePeer:
@@ -37,6 +38,8 @@ class NetworkNodePeer:
         }
 
     def compute_hash(self):
+        if get_hash_encoding() == 'binary':
+            return compute_binary_hash(PEER_CORE_SCHEMA, self)
         return compute_hash(self.peer_core_data())
 
     @classmethod
@@ -6,28 +6,44 @@ if TYPE_CHECKING:
     from ...types.network_types import PeerClientAdapter, NetworkNodePeerRegistry
     from ...types.core_types import Transaction, Block, POWConsensus
 
+# std import
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
 # 3rd import
 from loguru import logger
 
 # local import
 from .peer import NetworkNodePeer
+from .peer_metrics import PeerLatencyMetrics
 from ..http.http_peer_client_adapter import HTTPPeerClientAdapter
+from ..tcp.tcp_peer_client_adapter import TCPPeerClientAdapter
 from ...exceptions import PeerClientAdapterProtocolError
 from ...core.blockchain import BlockChainSummary
 
 
 class PeerClient:
-    def __init__(self):
+    def __init__(self, broadcast_workers: int = 8, broadcast_timeout: float = 15):
+        """
+        :param broadcast_workers: 广播时并发发送的线程数量
+        :param broadcast_timeout: 等待一次广播完成的最长时间(秒), 超时的邻居不再等待(请求本身的超时见adapter)
+        """
         self.node = None
         self.current_peers = None
 
+        self.broadcast_workers = broadcast_workers
+        self.broadcast_timeout = broadcast_timeout
+        self.__broadcast_executor: ThreadPoolExecutor | None = None
+        self.latency_metrics = PeerLatencyMetrics()
+
     def set_node(self, node: Node):
         self.node = node
         self.current_peers: NetworkNodePeerRegistry = self.node.peer_registry
 
     def get_adapter(self, protocol: str) -> PeerClientAdapter:
         res = {
-            'http': HTTPPeerClientAdapter()
+            'http': HTTPPeerClientAdapter(),
+            'tcp': TCPPeerClientAdapter()
         }.get(protocol, None)
 
         if res is None:
@@ -61,23 +77,50 @@ class PeerClient:
         adapter = self.get_adapter(peer.protocol)
         return adapter.get_blockchain_summary(peer)
 
+    def _get_broadcast_executor(self) -> ThreadPoolExecutor:
+        if self.__broadcast_executor is None:
+            self.__broadcast_executor = ThreadPoolExecutor(
+                max_workers=self.broadcast_workers, thread_name_prefix='peer-broadcast'
+            )
+        return self.__broadcast_executor
+
+    def _timed_send(self, send, peer: NetworkNodePeer, payload):
+        """
+        向单个邻居发送数据, 记录请求延迟, 请求失败只记录日志, 不影响其他邻居
+        """
+        start = perf_counter()
+        success = False
+        try:
+            res = send(peer, payload)
+            success = True
+            return res
+        except Exception as e:
+            logger.error(f"向邻居节点{peer.addr}广播失败: {e}")
+        finally:
+            self.latency_metrics.record(peer.hash, perf_counter() - start, success)
+
+    def _broadcast(self, send, payload):
+        """
+        并发地向所有邻居(不包括自己)发送数据, 耗时约等于响应最慢的邻居的请求时间
+        """
+        peers = [peer for peer in self.current_peers if peer.hash != self.node.self_peer_hash]
+        if not peers:
+            return
+
+        executor = self._get_broadcast_executor()
+        futures = {executor.submit(self._timed_send, send, peer, payload): peer for peer in peers}
+        _, not_done = wait(futures, timeout=self.broadcast_timeout)
+        for future in not_done:
+            logger.warning(f"向邻居节点{futures[future].addr}广播超时, 不再等待")
+
     def broadcast_block(self, block: Block):
-        for peer in self.current_peers:
-            if peer.hash == self.node.self_peer_hash:
-                continue
-            self._send_block(peer, block)
+        self._broadcast(self._send_block, block)
 
     def broadcast_tx(self, tx: Transaction):
-        for peer in self.current_peers:
-            if peer.hash == self.node.self_peer_hash:
-                continue
-            self._send_tx(peer, tx)
+        self._broadcast(self._send_tx, tx)
 
     def broadcast_peer(self, send_peer: NetworkNodePeer):
-        for peer in self.current_peers:
-            if peer.hash == self.node.self_peer_hash:
-                continue
-            self._send_peer(peer, send_peer)
+        self._broadcast(self._send_peer, send_peer)
 
     def request_block_chain_data(self, peer: NetworkNodePeer):
         """
@@ -85,6 +128,18 @@ class PeerClient:
         """
         return self.get_adapter(peer.protocol).get_blockchain_data(peer)
 
+    def request_headers(self, peer: NetworkNodePeer, locator: list[str], limit: int) -> dict | None:
+        """
+        以区块定位器向指定邻居节点请求区块头
+        """
+        return self.get_adapter(peer.protocol).get_headers(peer, locator, limit)
+
+    def request_blocks(self, peer: NetworkNodePeer, start: int, end: int) -> list[dict] | None:
+        """
+        获取指定邻居节点height在[start, end)范围内的区块数据
+        """
+        return self.get_adapter(peer.protocol).get_blocks(peer, start, end)
+
     def polling_blockchain_summary(self):
         """
         轮询邻居节点的区块链摘要信息, 并交给共识组件进行处理
@@ -0,0 +1,62 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : peer_metrics.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/14 15:10
+# 邻居节点的请求延迟统计
+
+# std import
+import threading
+
+
+__all__ = ['PeerLatencyMetrics']
+
+
+class _PeerLatency:
+    __slots__ = ['requests', 'failures', 'last', 'avg', 'max']
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.last = 0.0
+        self.avg = 0.0  # 指数移动平均
+        self.max = 0.0
+
+    def serialize(self) -> dict:
+        return {
+            'requests': self.requests,
+            'failures': self.failures,
+            'last_ms': round(self.last * 1000, 3),
+            'avg_ms': round(self.avg * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class PeerLatencyMetrics:
+    """
+    按peer hash记录请求的延迟(秒)与失败次数, 可在多个线程中同时记录
+    """
+    def __init__(self, alpha: float = 0.2):
+        """
+        :param alpha: 延迟指数移动平均的权重
+        """
+        self.alpha = alpha
+        self._peers: dict[str, _PeerLatency] = {}
+        self._lock = threading.Lock()
+
+    def record(self, peer_hash: str, latency: float, success: bool):
+        with self._lock:
+            m = self._peers.get(peer_hash, None)
+            if m is None:
+                m = self._peers[peer_hash] = _PeerLatency()
+
+            m.avg = latency if m.requests == 0 else m.avg + self.alpha * (latency - m.avg)
+            m.requests += 1
+            m.last = latency
+            m.max = max(m.max, latency)
+            if not success:
+                m.failures += 1
+
+    def info(self) -> dict:
+        with self._lock:
+            return {peer_hash: m.serialize() for peer_hash, m in self._peers.items()}
@@ -0,0 +1,177 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : async_http_peer_client_adapter.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/14 20:30
+# 基于asyncio的HTTP peer client adapter, HTTP客户端使用aiohttp(可选依赖, 创建adapter时才导入)
+#
+# adapter在后台线程中运行一个事件循环, 所有邻居的请求都在这一个事件循环中并发执行:
+#   * xxx_async: 协程方法, 供AsyncPeerClient在事件循环中并发地向大量邻居广播、轮询
+#   * xxx: 同步方法(实现PeerClientAdapter), 将协程提交到事件循环并等待结果, 供共识同步等同步调用方使用
+# 与HTTPPeerClientAdapter使用相同的HTTP API, 两种adapter的节点可以在同一网络中通信
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Coroutine
+    from ...types.core_types import Transaction, Block
+
+# std import
+import json
+import asyncio
+import threading
+
+# local import
+from ..abstract.peer_client_adapter import PeerClientAdapter
+from ...exceptions import PeerClientAdapterProtocolError, PeerClientAdapterDependencyError
+from ..common.peer import NetworkNodePeer
+
+
+__all__ = ['AsyncPeerClientAdapter']
+
+
+class AsyncPeerClientAdapter(PeerClientAdapter):
+    def __init__(self, connect_timeout: float = 3.05, request_timeout: float = 10, max_connections: int = 512):
+        """
+        :param connect_timeout: 建立连接的超时时间(秒)
+        :param request_timeout: 单个请求的总超时时间(秒)
+        :param max_connections: 连接池的最大连接数(所有邻居共享), 每个邻居保持keep-alive连接
+        """
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise PeerClientAdapterDependencyError("AsyncPeerClientAdapter requires aiohttp: pip install aiohttp") from e
+        self._aiohttp = aiohttp
+
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._session = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def protocol(self) -> str:
+        return 'http'
+
+    def check_peer_protocol(self, peer: NetworkNodePeer):
+        if peer.protocol != self.protocol:
+            raise PeerClientAdapterProtocolError(f'peer: {peer.protocol}, adapter: {self.protocol}')
+
+    ################################################
+    # event loop
+    ################################################
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        后台线程中运行的事件循环, 首次使用时启动
+        """
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='async-peer-client', daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def run(self, coro: Coroutine, timeout: float | None = None) -> Any:
+        """
+        在后台事件循环中执行协程, 阻塞等待结果(不可以在事件循环线程中调用)
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def close(self):
+        if self._loop is None:
+            return
+
+        if self._session is not None:
+            self.run(self._session.close())
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    def _get_session(self):
+        """
+        在事件循环中调用, aiohttp的session必须在其所属的事件循环中创建
+        """
+        if self._session is None:
+            aiohttp = self._aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout, connect=self.connect_timeout),
+                json_serialize=lambda d: json.dumps(d, sort_keys=True)
+            )
+        return self._session
+
+    async def _get(self, url: str):
+        async with self._get_session().get(url) as resp:
+            if resp.ok:
+                return await resp.json(content_type=None)
+            return None
+
+    async def _post_encoded(self, url: str, payload: bytes):
+        headers = {"Content-Type": "application/json"}
+        async with self._get_session().post(url, data=payload, headers=headers) as resp:
+            if resp.ok:
+                return await resp.json(content_type=None)
+            return None
+
+    async def _post(self, url: str, data):
+        return await self._post_encoded(url, json.dumps(data, sort_keys=True).encode())
+
+    ################################################
+    # async api
+    ################################################
+
+    async def send_block_async(self, peer: NetworkNodePeer, block: Block):
+        self.check_peer_protocol(peer)
+        return await self._post_encoded(f"{peer.addr}/broadcast/block", block.encoded())
+
+    async def send_tx_async(self, peer: NetworkNodePeer, tx: Transaction):
+        self.check_peer_protocol(peer)
+        return await self._post_encoded(f"{peer.addr}/broadcast/tx", tx.encoded())
+
+    async def send_peer_async(self, peer: NetworkNodePeer, send_peer_info: NetworkNodePeer):
+        self.check_peer_protocol(peer)
+        return await self._post(f"{peer.addr}/broadcast/peer", send_peer_info.serialize())
+
+    async def get_blockchain_summary_async(self, peer: NetworkNodePeer):
+        self.check_peer_protocol(peer)
+        return await self._get(f"{peer.addr}/blockchain/summary")
+
+    ################################################
+    # PeerClientAdapter
+    ################################################
+
+    def send_block(self, peer: NetworkNodePeer, block: Block):
+        return self.run(self.send_block_async(peer, block))
+
+    def send_tx(self, peer: NetworkNodePeer, tx: Transaction):
+        return self.run(self.send_tx_async(peer, tx))
+
+    def send_peer(self, peer: NetworkNodePeer, send_peer_info: NetworkNodePeer):
+        return self.run(self.send_peer_async(peer, send_peer_info))
+
+    def get_blockchain_summary(self, peer: NetworkNodePeer):
+        return self.run(self.get_blockchain_summary_async(peer))
+
+    def get_blockchain_data(self, peer: NetworkNodePeer) -> dict:
+        self.check_peer_protocol(peer)
+        return self.run(self._get(f"{peer.addr}/blockchain"))
+
+    def get_headers(self, peer: NetworkNodePeer, locator: list[str], limit: int) -> dict | None:
+        self.check_peer_protocol(peer)
+        return self.run(self._post(f"{peer.addr}/headers", {'locator': locator, 'limit': limit}))
+
+    def get_blocks(self, peer: NetworkNodePeer, start: int, end: int) -> list[dict] | None:
+        self.check_peer_protocol(peer)
+        return self.run(self._get(f"{peer.addr}/blocks?from={start}&to={end}"))
+
+    def join_network(self, peer: NetworkNodePeer, self_peer_info: NetworkNodePeer) -> list[NetworkNodePeer] | None:
+        self.check_peer_protocol(peer)
+        resp = self.run(self._post(f"{peer.addr}/join", self_peer_info.serialize()))
+        if resp:
+            return [NetworkNodePeer.deserialize(pd) for pd in resp]
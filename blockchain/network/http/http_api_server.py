@@ -9,27 +9,53 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
-    from ...types.core_types import ExecuteResult
+    from ...types.role_types import Node
 
 # std import
+import json
 import functools
 
 # 3rd import
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from loguru import logger
+from werkzeug.serving import WSGIRequestHandler
 
 # local import
 from ..abstract.api_server import API
+from ...core.execute_result import ExecuteResult, ExecuteResultErrorTypes
 from ...core.block import Block
 from ...core.transaction import Transaction
 from ...network.common.peer import NetworkNodePeer
+from .http_response_cache import HTTPResponseCache
 
 
-__all__ = ['HTTPAPI']
+__all__ = ['HTTPAPI', 'HTTP_SERVERS']
+
+
+# 可选的API服务器
+HTTP_SERVERS = ('dev', 'waitress')
+
+# headers-first同步时, 单次请求返回的区块头、区块数量上限
+MAX_HEADERS_PER_REQUEST = 2000
+MAX_BLOCKS_PER_REQUEST = 100
 
 http = Flask('node-http-api-server')
 http.json.sort_keys = True  # 显式要求flask的json排列key
 
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """
+    werkzeug默认使用HTTP/1.0, 每个请求结束后关闭连接; 使用HTTP/1.1使客户端(JSONClient的连接池)可以复用连接
+    """
+    protocol_version = 'HTTP/1.1'
+
+
+def json_bytes_response(payload: bytes) -> Response:
+    """
+    直接返回已编码的json数据(区块、交易缓存的编码数据), 不经过jsonify重新编码
+    """
+    return Response(payload, mimetype='application/json')
+
+
 router_registry = {}
 def http_route(rule, **options):
     def decorator(method):
@@ -37,12 +63,15 @@ def http_route(rule, **options):
         标记Node类的方法，将其与Flask.route绑定
         并自动处理将返回值：
             1. 正常请求: 包装为json字符串
-            2. TODO: 出现异常，返回异常信息
+            2. 返回值已经是Response(需要自定义header、状态码): 原样返回
+            3. TODO: 出现异常，返回异常信息
         """
         router_registry[method.__name__] = (rule, options)
         @functools.wraps(method)
         def wrapper(self, *args, **kwargs):
             res = method(self, *args, **kwargs)
+            if isinstance(res, Response):
+                return res
             return jsonify(res)
         return wrapper
     return decorator
@@ -53,13 +82,41 @@ class HTTPAPI(API):
     def protocol(self):
         return 'http'
 
-    def __init__(self, host, port):
+    def __init__(
+            self, host, port, server: str = 'dev', threads: int = 8,
+            keep_alive_timeout: int = 120, connection_limit: int = 1000,
+            max_request_size: int | None = 16 * 1024 * 1024
+        ):
+        """
+        :param server: 运行API的服务器
+                       * dev: Flask自带的开发服务器(每个请求一个线程)
+                       * waitress: 多线程的生产环境WSGI服务器(需要waitress), 固定数量的工作线程处理请求
+        :param threads: waitress的工作线程数量(节点数据保存在进程内, 不支持多进程)
+        :param keep_alive_timeout: waitress中空闲的keep-alive连接保持的时间(秒)
+        :param connection_limit: waitress同时保持的最大连接数
+        :param max_request_size: 请求体的最大大小(字节), 超出时返回413, None为不限制
+        """
         super().__init__()
         self.host = host
         self.port = port
 
         self.addr = f'{self.protocol}://{self.host}:{self.port}'
 
+        if server not in HTTP_SERVERS:
+            raise ValueError(f"unsupported http server: {server}, supported: {HTTP_SERVERS}")
+        self.server = server
+        self.threads = threads
+        self.keep_alive_timeout = keep_alive_timeout
+        self.connection_limit = connection_limit
+        self.max_request_size = max_request_size
+
+        # 整条链、链摘要的响应缓存, 以链的tip为key
+        self.response_cache = HTTPResponseCache()
+
+    def set_node(self, node: Node):
+        super().set_node(node)
+        self.blockchain.add_change_listener(self.response_cache.invalidate)
+
     def _register_router(self):
         """
         将当前类的方法，与flask app router绑定
@@ -95,18 +152,72 @@ class HTTPAPI(API):
     @http_route('/blockchain', methods=['GET'])
     def _api_download(self):
         """
-        下载json格式的区块链数据
+        下载json格式的区块链数据, 支持ETag(If-None-Match)与gzip
         """
-        return self.blockchain.serialize()
+        return self.response_cache.response('blockchain', lambda: self.blockchain.tip, self.blockchain.encoded)
 
     @http_route('/blockchain/summary', methods=['GET'])
     def _api_download_summary(self):
-        return self.blockchain.serialize_summary()
+        """
+        下载区块链摘要, 支持ETag(If-None-Match)与gzip
+        """
+        return self.response_cache.response(
+            'blockchain_summary', lambda: self.blockchain.tip,
+            lambda: json.dumps(self.blockchain.serialize_summary(), sort_keys=True).encode()
+        )
+
+    @http_route('/headers', methods=['POST'])
+    def _api_get_headers(self):
+        """
+        headers-first同步, 接收的请求体为:
+        {
+            locator: 区块定位器(区块hash列表, 由高到低),
+            limit: 最多返回的区块头数量(不超过MAX_HEADERS_PER_REQUEST)
+        }
+        返回:
+        {
+            fork_height: locator中第一个在本机链上的区块的height(都不在链上时为-1),
+            headers: fork_height之后的区块头
+        }
+        """
+        data: dict = request.get_json()
+        limit = min(max(int(data.get('limit', MAX_HEADERS_PER_REQUEST)), 0), MAX_HEADERS_PER_REQUEST)
+
+        fork_height = self.blockchain.locate(data.get('locator', []))
+        return {
+            'fork_height': fork_height,
+            'headers': self.blockchain.get_headers(fork_height + 1, limit)
+        }
+
+    @http_route('/blocks', methods=['GET'])
+    def _api_get_blocks(self):
+        """
+        按height范围下载区块, query参数:
+            * from: 起始height(包含)
+            * to: 结束height(不包含), 单次最多MAX_BLOCKS_PER_REQUEST个区块
+        """
+        start = max(request.args.get('from', 0, type=int), 0)
+        end = min(request.args.get('to', start + MAX_BLOCKS_PER_REQUEST, type=int), start + MAX_BLOCKS_PER_REQUEST)
+        return json_bytes_response(self.blockchain.encoded_range(start, end))
+
+    @http_route('/chain_params', methods=['GET'])
+    def _api_chain_params(self):
+        return {
+            'difficulty': self.blockchain.pow_difficulty,
+            'hash_startwith': self.blockchain.pow_check,
+            'reward': self.blockchain.pow_reward,
+            'hash_encoding': self.blockchain.hash_encoding
+        }
 
     @http_route('/block', methods=['POST'])
     def _api_add_block(self) -> ExecuteResult:
         block_data: dict = request.get_json()
         block = Block.deserialize(block_data)
+        if block is not None and not self.blockchain.prevalidate_block_transactions(block):
+            msg = f"区块{block.hash}内的交易签名验证失败"
+            logger.error(msg)
+            return ExecuteResult(False, ExecuteResultErrorTypes.BLK_INVALID_TX, msg).serialize()
+
         res: ExecuteResult = self.blockchain.add_block(block)
         return res.serialize()
 
@@ -121,7 +232,72 @@ class HTTPAPI(API):
     @http_route('/last_block', methods=['GET'])
     def _api_last_block(self):
         lb = self.blockchain.last_block
-        return lb.serialize() if lb else None
+        return json_bytes_response(lb.encoded()) if lb else None
+
+    @http_route('/block/<string:block_hash>', methods=['GET'])
+    def _api_get_block(self, block_hash):
+        b = self.blockchain.get_block_by_hash(block_hash)
+        return json_bytes_response(b.encoded()) if b else None
+
+    @http_route('/block/height/<int:height>', methods=['GET'])
+    def _api_get_block_by_height(self, height):
+        """
+        height为区块在链上的位置(从0开始)
+        """
+        b = self.blockchain.get_block_by_height(height)
+        return json_bytes_response(b.encoded()) if b else None
+
+    @http_route('/tx/<string:tx_hash>', methods=['GET'])
+    def _api_get_transaction(self, tx_hash):
+        """
+        返回链上的交易, 结构如下:
+        {
+            'transaction': 交易数据,
+            'block_hash': 所在区块的hash,
+            'height': 所在区块的height,
+            'position': 交易在区块内的位置
+        }
+        """
+        res = self.blockchain.get_transaction(tx_hash)
+        if res is None:
+            return None
+
+        tx, height, position = res
+        return {
+            'transaction': tx.serialize(),
+            'block_hash': self.blockchain[height].hash,
+            'height': height,
+            'position': position
+        }
+
+    @http_route('/tx/<string:tx_hash>/proof', methods=['GET'])
+    def _api_get_transaction_proof(self, tx_hash):
+        """
+        返回链上交易的merkle包含证明, 结构如下:
+        {
+            'transaction': 交易数据,
+            'block_hash': 所在区块的hash,
+            'header': 所在区块的区块头(hash计算数据, 包含merkle_root),
+            'height': 所在区块的height,
+            'position': 交易在区块内的位置,
+            'proof': [[兄弟节点位置('left'/'right'), 兄弟节点hash], ...]
+        }
+        验证方式见merkle_tools.verify_merkle_proof, 区块头的hash应当与block_hash一致
+        """
+        res = self.blockchain.get_transaction(tx_hash)
+        if res is None:
+            return None
+
+        tx, height, position = res
+        block = self.blockchain[height]
+        return {
+            'transaction': tx.serialize(),
+            'block_hash': block.hash,
+            'header': block.block_core_data(),
+            'height': height,
+            'position': position,
+            'proof': block.merkle_proof(position)
+        }
 
     @http_route('/pow_difficulty', methods=['GET'])
     def _api_pow_difficulty(self):
@@ -129,14 +305,42 @@ class HTTPAPI(API):
         返回一个PoW难题, 结构如下:
         {
             'difficulty': 4,
-            'hash_startwith': '0000'
+            'hash_startwith': '0000',
+            'hash_encoding': 'json'
         }
         """
         return {
             'hash_startwith': self.blockchain.pow_check,
-            'difficulty': self.blockchain.pow_difficulty
+            'difficulty': self.blockchain.pow_difficulty,
+            'hash_encoding': self.blockchain.hash_encoding
         }
 
+    @http_route('/mining_template/<string:miner_addr>', methods=['GET'])
+    def _api_mining_template(self, miner_addr):
+        """
+        返回挖矿区块模板, 结构见BlockTemplateManager.build, ETag为模板版本标识
+        """
+        template = self.node.block_template.build(miner_addr)
+        resp = jsonify(template)
+        resp.set_etag(template['state']['etag'])
+        return resp
+
+    @http_route('/mining_template/state', methods=['GET'])
+    def _api_mining_template_state(self):
+        """
+        返回挖矿区块模板的版本状态, query参数:
+            * known: 已知的模板版本标识, 与当前版本相同时阻塞等待(长轮询)
+            * timeout: 长轮询的最长等待时间(秒), 默认0, 最大60
+        同时支持If-None-Match, 版本未变化时返回304
+        """
+        known = request.args.get('known', None)
+        timeout = min(max(request.args.get('timeout', 0, type=float), 0), 60)
+
+        state = self.node.block_template.wait_for_change(known, timeout)
+        resp = jsonify(state)
+        resp.set_etag(state['etag'])
+        return resp.make_conditional(request)
+
     @http_route('/transaction', methods=['POST'])
     def _api_add_transaction(self):
         tx_data: dict = request.get_json()
@@ -165,9 +369,21 @@ class HTTPAPI(API):
     @http_route('/broadcast/block', methods=['POST'])
     def _api_get_broadcast_block(self):
         block_data: dict = request.get_json()
+
+        # 已在链上的区块不再反序列化(反序列化需要重新计算所有交易的hash)
+        if block_data.get('hash', None) in self.blockchain:
+            msg = f"收到来自广播的重复block：{block_data['hash']}"
+            logger.info(msg)
+            return ExecuteResult(False, ExecuteResultErrorTypes.BLK_REPEAT, msg).serialize()
+
         block = Block.deserialize(block_data)
         block.mark_from_peer()
         logger.info(f"收到来自广播的block：{block.hash}")
+        if not self.blockchain.prevalidate_block_transactions(block):
+            msg = f"来自广播的block：{block.hash}内的交易签名验证失败"
+            logger.error(msg)
+            return ExecuteResult(False, ExecuteResultErrorTypes.BLK_INVALID_TX, msg).serialize()
+
         res: ExecuteResult = self.blockchain.add_block(block)
         return res.serialize()
 
@@ -183,4 +399,27 @@ class HTTPAPI(API):
 
     def run(self):
         self._register_router()
-        http.run(host=self.host, port=self.port)
+        http.config['MAX_CONTENT_LENGTH'] = self.max_request_size
+
+        if self.server == 'waitress':
+            self._run_waitress()
+        else:
+            http.run(host=self.host, port=self.port, request_handler=KeepAliveRequestHandler)
+
+    def _run_waitress(self):
+        try:
+            import waitress
+        except ImportError as e:
+            raise ImportError("server 'waitress' requires waitress: pip install waitress") from e
+
+        options = {
+            'threads': self.threads,
+            'channel_timeout': self.keep_alive_timeout,
+            'connection_limit': self.connection_limit,
+            'ident': 'node-http-api-server'
+        }
+        if self.max_request_size is not None:
+            options['max_request_body_size'] = self.max_request_size
+
+        logger.info(f"使用waitress运行API, 工作线程: {self.threads}")
+        waitress.serve(http, host=self.host, port=self.port, **options)
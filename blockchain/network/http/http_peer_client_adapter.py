@@ -17,7 +17,10 @@ from ..common.peer import NetworkNodePeer
 from ...tools.http_client_json import JSONClient
 
 
-json_client = JSONClient()
+# 与邻居节点之间的请求超时时间(秒), 避免无响应的邻居长时间占用广播线程
+PEER_REQUEST_TIMEOUT = 10
+
+json_client = JSONClient(read_timeout=PEER_REQUEST_TIMEOUT)
 
 
 class HTTPPeerClientAdapter(PeerClientAdapter):
@@ -32,12 +35,12 @@ class HTTPPeerClientAdapter(PeerClientAdapter):
     def send_block(self, peer: NetworkNodePeer, block: Block):
         self.check_peer_protocol(peer)
         api_path = '/broadcast/block'
-        return json_client.post(url=f"{peer.addr}{api_path}", data=block.serialize())
+        return json_client.post_encoded(url=f"{peer.addr}{api_path}", payload=block.encoded())
 
     def send_tx(self, peer: NetworkNodePeer, tx: Transaction):
         self.check_peer_protocol(peer)
         api_path = '/broadcast/tx'
-        return json_client.post(url=f"{peer.addr}{api_path}", data=tx.serialize())
+        return json_client.post_encoded(url=f"{peer.addr}{api_path}", payload=tx.encoded())
 
     def send_peer(self, peer: NetworkNodePeer, send_peer_info: NetworkNodePeer):
         self.check_peer_protocol(peer)
@@ -57,6 +60,18 @@ class HTTPPeerClientAdapter(PeerClientAdapter):
 
         return json_client.get(url=f"{peer.addr}{api_path}")
 
+    def get_headers(self, peer: NetworkNodePeer, locator: list[str], limit: int) -> dict | None:
+        self.check_peer_protocol(peer)
+        api_path = '/headers'
+
+        return json_client.post(url=f"{peer.addr}{api_path}", data={'locator': locator, 'limit': limit})
+
+    def get_blocks(self, peer: NetworkNodePeer, start: int, end: int) -> list[dict] | None:
+        self.check_peer_protocol(peer)
+        api_path = f'/blocks?from={start}&to={end}'
+
+        return json_client.get(url=f"{peer.addr}{api_path}")
+
     def join_network(self, peer: NetworkNodePeer, self_peer_info: NetworkNodePeer) -> list[NetworkNodePeer] | None:
         self.check_peer_protocol(peer)
         api_path = '/join'
@@ -0,0 +1,114 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : http_response_cache.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/14 10:20
+# HTTP API的响应缓存
+#
+# 整条链、链摘要这类响应的内容只由链的tip决定, 以tip(高度 + tip区块hash)为key缓存编码后的数据,
+# 链的tip不变时, 重复请求直接返回缓存的数据(邻居节点每分钟都会轮询链摘要)
+#   * ETag为tip, 客户端携带If-None-Match且tip未变化时返回304
+#   * 客户端支持gzip时返回压缩后的数据, 压缩结果同样被缓存
+# 区块上链、回滚时由区块链主动清空缓存; 同时每次读取都会比较key, 不会返回过期的数据
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Callable, Hashable
+
+# std import
+import gzip
+import threading
+
+# 3rd import
+from flask import Response, request
+
+
+__all__ = ['HTTPResponseCache']
+
+
+class _CachedResponse:
+    __slots__ = ['key', 'etag', 'body', 'gzipped']
+
+    def __init__(self, key: Hashable, etag: str, body: bytes):
+        self.key = key
+        self.etag = etag
+        self.body = body
+        self.gzipped: bytes | None = None
+
+
+class HTTPResponseCache:
+    def __init__(self, gzip_min_size: int = 1024, gzip_level: int = 6):
+        """
+        :param gzip_min_size: 小于此大小(字节)的响应不压缩
+        :param gzip_level: gzip压缩级别
+        """
+        self.gzip_min_size = gzip_min_size
+        self.gzip_level = gzip_level
+
+        self._entries: dict[str, _CachedResponse] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified
+        }
+
+    def _get_entry(self, name: str, key_func: Callable[[], Hashable], build: Callable[[], bytes]) -> _CachedResponse:
+        key = key_func()
+        entry = self._entries.get(name, None)
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = _CachedResponse(key, '-'.join(str(k) for k in (name, *key)), build())
+
+        # 生成数据期间链发生了变化, 数据可能属于新的tip, 不缓存
+        if key_func() == key:
+            with self._lock:
+                self._entries[name] = entry
+        return entry
+
+    def _gzipped(self, entry: _CachedResponse) -> bytes:
+        if entry.gzipped is None:
+            entry.gzipped = gzip.compress(entry.body, compresslevel=self.gzip_level)
+        return entry.gzipped
+
+    def response(self, name: str, key_func: Callable[[], Hashable], build: Callable[[], bytes]) -> Response:
+        """
+        返回缓存的json响应, 需要在flask的请求上下文中调用
+
+        :param name: 缓存项名称(每个接口一项)
+        :param key_func: 返回当前的缓存key(链的tip), key为tuple
+        :param build: 缓存未命中时, 生成json编码数据
+        """
+        entry = self._get_entry(name, key_func, build)
+
+        if entry.etag in request.if_none_match:
+            self.not_modified += 1
+            resp = Response(status=304)
+            resp.set_etag(entry.etag)
+            return resp
+
+        if len(entry.body) >= self.gzip_min_size and 'gzip' in request.accept_encodings:
+            resp = Response(self._gzipped(entry), mimetype='application/json')
+            resp.headers['Content-Encoding'] = 'gzip'
+        else:
+            resp = Response(entry.body, mimetype='application/json')
+
+        resp.headers['Vary'] = 'Accept-Encoding'
+        resp.set_etag(entry.etag)
+        return resp
@@ -0,0 +1,215 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : tcp_api_server.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/15 16:10
+# 运行在tcp协议下的API
+#
+# 节点之间的通信(加入网络、广播、共识同步)使用tcp长连接上的二进制消息, 消息格式见tcp_protocol;
+# 钱包、矿工等客户端的接口不变, 仍然由HTTPAPI在HTTP端口上提供
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Callable
+
+# std import
+import socket
+import threading
+import socketserver
+
+# 3rd import
+from loguru import logger
+
+# local import
+from ..http.http_api_server import HTTPAPI, MAX_HEADERS_PER_REQUEST, MAX_BLOCKS_PER_REQUEST
+from ...core.execute_result import ExecuteResult, ExecuteResultErrorTypes
+from ...core.block import Block
+from ...core.transaction import Transaction
+from ...network.common.peer import NetworkNodePeer
+from ...tools.binary_encoding import TX_SCHEMA, BLOCK_SCHEMA
+from ...exceptions import TCPProtocolError
+from .tcp_protocol import (
+    MSG_ALIVE, MSG_JOIN, MSG_TX_BATCH, MSG_BLOCK, MSG_PEER,
+    MSG_GET_SUMMARY, MSG_GET_CHAIN, MSG_GET_HEADERS, MSG_GET_BLOCKS,
+    MSG_ERROR, RESPONSE_FLAG,
+    encode_frame, read_frame, encode_json, decode_json, encode_record_list, decode_record_list
+)
+
+
+__all__ = ['TCPAPI']
+
+
+class _TCPConnectionHandler(socketserver.BaseRequestHandler):
+    """
+    每个连接一个线程, 依次处理连接上的请求帧, 直到对方关闭连接
+    """
+    server: _TCPServer
+
+    def handle(self):
+        sock: socket.socket = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        api = self.server.api
+
+        while True:
+            try:
+                msg_type, request_id, body = read_frame(sock)
+            except (OSError, TCPProtocolError):
+                return
+
+            try:
+                resp_type, resp_body = msg_type | RESPONSE_FLAG, api.handle_message(msg_type, body)
+            except Exception as e:
+                logger.error(f"处理tcp消息失败, 消息类型: {msg_type}, 错误: {e}")
+                resp_type, resp_body = MSG_ERROR, encode_json(str(e))
+
+            try:
+                sock.sendall(encode_frame(resp_type, request_id, resp_body))
+            except OSError:
+                return
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, addr: tuple[str, int], api: TCPAPI):
+        self.api = api
+        super().__init__(addr, _TCPConnectionHandler)
+
+
+class TCPAPI(HTTPAPI):
+    @property
+    def protocol(self):
+        return 'tcp'
+
+    def __init__(self, host, port, tcp_port, **http_options):
+        """
+        :param port: 钱包、矿工使用的HTTP端口
+        :param tcp_port: 节点之间通信的tcp端口
+        :param http_options: 见HTTPAPI
+        """
+        super().__init__(host, port, **http_options)
+        self.tcp_port = tcp_port
+
+        self.http_addr = f'http://{self.host}:{self.port}'
+        self.addr = f'tcp://{self.host}:{self.tcp_port}'
+
+        self.handlers: dict[int, Callable[[bytes], bytes]] = {
+            MSG_ALIVE: self._tcp_alive,
+            MSG_JOIN: self._tcp_join,
+            MSG_TX_BATCH: self._tcp_tx_batch,
+            MSG_BLOCK: self._tcp_block,
+            MSG_PEER: self._tcp_peer,
+            MSG_GET_SUMMARY: self._tcp_get_summary,
+            MSG_GET_CHAIN: self._tcp_get_chain,
+            MSG_GET_HEADERS: self._tcp_get_headers,
+            MSG_GET_BLOCKS: self._tcp_get_blocks,
+        }
+
+    def handle_message(self, msg_type: int, body: bytes) -> bytes:
+        handler = self.handlers.get(msg_type, None)
+        if handler is None:
+            raise TCPProtocolError(f"unknown message type: {msg_type}")
+        return handler(body)
+
+    def _tcp_alive(self, body: bytes) -> bytes:
+        return encode_json(True)
+
+    def _tcp_join(self, body: bytes) -> bytes:
+        """
+        注册请求的节点信息, 返回自己的所有邻居(包括自己), 同HTTPAPI的/join
+        """
+        self_peers = [np.serialize() for np in self.peer_registry.values()]
+
+        peer = NetworkNodePeer.deserialize(decode_json(body))
+        return encode_json(self_peers if self.peer_registry.add(peer) else None)
+
+    def _tcp_tx_batch(self, body: bytes) -> bytes:
+        """
+        批量接收广播的交易, 先整批预验签(可使用并行验签), 再逐笔进入交易池
+
+        :return: {'accepted': 进入交易池的数量, 'rejected': 被拒绝的数量}
+        """
+        records = decode_record_list(body, TX_SCHEMA)
+
+        txs = []
+        for tx_data in records:
+            try:
+                tx = Transaction.deserialize(tx_data)
+            except Exception as e:
+                logger.error(f"来自广播的交易反序列化失败: {e}")
+                continue
+            tx.mark_from_peer()
+            txs.append(tx)
+
+        # 验签结果进入缓存, 交易池中的签名检查直接命中缓存
+        self.node.tx_validator.verify_transactions(txs)
+
+        accepted = sum(1 for tx in txs if self.txpool.add_transaction(tx).success)
+        logger.info(f"收到来自广播的交易批量: {len(records)}笔, 进入交易池: {accepted}笔")
+        return encode_json({'accepted': accepted, 'rejected': len(records) - accepted})
+
+    def _tcp_block(self, body: bytes) -> bytes:
+        (block_data,) = decode_record_list(body, BLOCK_SCHEMA)
+
+        # 已在链上的区块不再反序列化(反序列化需要重新计算所有交易的hash)
+        if block_data.get('hash', None) in self.blockchain:
+            msg = f"收到来自广播的重复block：{block_data['hash']}"
+            logger.info(msg)
+            return encode_json(ExecuteResult(False, ExecuteResultErrorTypes.BLK_REPEAT, msg).serialize())
+
+        block = Block.deserialize(block_data)
+        block.mark_from_peer()
+        logger.info(f"收到来自广播的block：{block.hash}")
+        if not self.blockchain.prevalidate_block_transactions(block):
+            msg = f"来自广播的block：{block.hash}内的交易签名验证失败"
+            logger.error(msg)
+            return encode_json(ExecuteResult(False, ExecuteResultErrorTypes.BLK_INVALID_TX, msg).serialize())
+
+        res: ExecuteResult = self.blockchain.add_block(block)
+        return encode_json(res.serialize())
+
+    def _tcp_peer(self, body: bytes) -> bytes:
+        peer = NetworkNodePeer.deserialize(decode_json(body))
+        logger.info(f"收到来自广播的peer：{peer.hash}")
+        return encode_json(self.peer_registry.add(peer))
+
+    def _tcp_get_summary(self, body: bytes) -> bytes:
+        return encode_json(self.blockchain.serialize_summary())
+
+    def _tcp_get_chain(self, body: bytes) -> bytes:
+        return encode_record_list(BLOCK_SCHEMA, self.blockchain)
+
+    def _tcp_get_headers(self, body: bytes) -> bytes:
+        """
+        headers-first同步, 请求与响应同HTTPAPI的/headers
+        """
+        data: dict = decode_json(body)
+        limit = min(max(int(data.get('limit', MAX_HEADERS_PER_REQUEST)), 0), MAX_HEADERS_PER_REQUEST)
+
+        fork_height = self.blockchain.locate(data.get('locator', []))
+        return encode_json({
+            'fork_height': fork_height,
+            'headers': self.blockchain.get_headers(fork_height + 1, limit)
+        })
+
+    def _tcp_get_blocks(self, body: bytes) -> bytes:
+        """
+        按height范围[from, to)下载区块, 单次最多MAX_BLOCKS_PER_REQUEST个区块
+        """
+        data: dict = decode_json(body)
+        start = max(int(data.get('from', 0)), 0)
+        end = min(int(data.get('to', start + MAX_BLOCKS_PER_REQUEST)), start + MAX_BLOCKS_PER_REQUEST)
+        return encode_record_list(BLOCK_SCHEMA, self.blockchain[start:end])
+
+    def get_self_peer_info(self):
+        return NetworkNodePeer(protocol='tcp', addr=self.addr)
+
+    def run(self):
+        tcp_server = _TCPServer((self.host, self.tcp_port), self)
+        threading.Thread(target=tcp_server.serve_forever, name='node-tcp-api-server', daemon=True).start()
+        logger.info(f"节点间tcp协议监听: {self.addr}, HTTP API: {self.http_addr}")
+
+        super().run()
@@ -0,0 +1,194 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : tcp_client.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/15 15:00
+# tcp协议的客户端
+#
+# 每个邻居保持一个长连接, 同一连接上的请求依次执行(请求-响应);
+# 交易按邻居合并为批量消息, 由后台线程在批量已满或等待超过flush_interval时发送
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ...types.core_types import Transaction
+
+# std import
+import socket
+import threading
+from time import monotonic
+from urllib.parse import urlsplit
+
+# 3rd import
+from loguru import logger
+
+# local import
+from .tcp_protocol import (
+    MSG_TX_BATCH, MSG_ERROR, RESPONSE_FLAG,
+    encode_frame, read_frame, decode_json, encode_record_list
+)
+from ...tools.binary_encoding import TX_SCHEMA
+from ...exceptions import TCPProtocolError
+
+
+__all__ = ['TCPClient']
+
+
+class _PeerConnection:
+    """
+    与一个邻居之间的长连接
+    """
+    def __init__(self, addr: str, connect_timeout: float, timeout: float):
+        parts = urlsplit(addr)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+
+        self._sock: socket.socket | None = None
+        self._lock = threading.Lock()
+        self._next_request_id = 0
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        return sock
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def _request_once(self, msg_type: int, body: bytes) -> tuple[int, bytes]:
+        self._next_request_id = (self._next_request_id + 1) & 0xFFFFFFFF
+        request_id = self._next_request_id
+
+        self._sock.sendall(encode_frame(msg_type, request_id, body))
+        resp_type, resp_id, resp_body = read_frame(self._sock)
+        if resp_id != request_id:
+            raise TCPProtocolError(f"response id mismatch: {resp_id} != {request_id}")
+        return resp_type, resp_body
+
+    def request(self, msg_type: int, body: bytes = b'') -> bytes:
+        """
+        发送请求并等待响应, 复用的连接已被对方关闭时重新连接并重试一次
+        """
+        with self._lock:
+            reused = self._sock is not None
+            if not reused:
+                self._sock = self._connect()
+
+            try:
+                resp_type, resp_body = self._request_once(msg_type, body)
+            except (OSError, TCPProtocolError):
+                self.close()
+                if not reused:
+                    raise
+                self._sock = self._connect()
+                try:
+                    resp_type, resp_body = self._request_once(msg_type, body)
+                except (OSError, TCPProtocolError):
+                    self.close()
+                    raise
+
+        if resp_type == MSG_ERROR:
+            raise TCPProtocolError(f"peer error: {decode_json(resp_body)}")
+        if resp_type != msg_type | RESPONSE_FLAG:
+            raise TCPProtocolError(f"unexpected response type: {resp_type}")
+        return resp_body
+
+
+class _TxBatcher:
+    """
+    合并发往同一个邻居的交易
+    """
+    def __init__(self, connection: _PeerConnection, max_batch: int, flush_interval: float):
+        self.connection = connection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+
+        self._pending: list[Transaction] = []
+        self._first_pending_at = 0.0
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name=f'tcp-tx-batcher-{connection.port}', daemon=True).start()
+
+    def add(self, tx: Transaction):
+        with self._cond:
+            if not self._pending:
+                self._first_pending_at = monotonic()
+            self._pending.append(tx)
+            # 第一笔交易开始计时, 批量已满时立即发送
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def _take_batch(self) -> list[Transaction]:
+        with self._cond:
+            while True:
+                if self._pending:
+                    wait = self._first_pending_at + self.flush_interval - monotonic()
+                    if len(self._pending) >= self.max_batch or wait <= 0:
+                        batch = self._pending[:self.max_batch]
+                        del self._pending[:self.max_batch]
+                        self._first_pending_at = monotonic()
+                        return batch
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            try:
+                self.connection.request(MSG_TX_BATCH, encode_record_list(TX_SCHEMA, batch))
+            except Exception as e:
+                logger.error(f"向邻居节点{self.connection.host}:{self.connection.port}发送交易批量失败({len(batch)}): {e}")
+
+
+class TCPClient:
+    def __init__(
+            self, connect_timeout: float = 3.05, timeout: float = 30,
+            max_tx_batch: int = 1024, tx_flush_interval: float = 0.02
+        ):
+        """
+        :param connect_timeout: 建立连接的超时时间(秒)
+        :param timeout: 等待响应的超时时间(秒)
+        :param max_tx_batch: 单个交易批量消息的最大交易数量
+        :param tx_flush_interval: 交易在批量中等待的最长时间(秒)
+        """
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.max_tx_batch = max_tx_batch
+        self.tx_flush_interval = tx_flush_interval
+
+        self._connections: dict[str, _PeerConnection] = {}
+        self._batchers: dict[str, _TxBatcher] = {}
+        self._lock = threading.Lock()
+
+    def connection(self, addr: str) -> _PeerConnection:
+        conn = self._connections.get(addr, None)
+        if conn is None:
+            with self._lock:
+                conn = self._connections.get(addr, None)
+                if conn is None:
+                    conn = self._connections[addr] = _PeerConnection(addr, self.connect_timeout, self.timeout)
+        return conn
+
+    def request(self, addr: str, msg_type: int, body: bytes = b'') -> bytes:
+        return self.connection(addr).request(msg_type, body)
+
+    def queue_tx(self, addr: str, tx: Transaction):
+        """
+        将交易加入发往addr的批量, 立即返回
+        """
+        batcher = self._batchers.get(addr, None)
+        if batcher is None:
+            conn = self.connection(addr)
+            with self._lock:
+                batcher = self._batchers.get(addr, None)
+                if batcher is None:
+                    batcher = self._batchers[addr] = _TxBatcher(conn, self.max_tx_batch, self.tx_flush_interval)
+        batcher.add(tx)
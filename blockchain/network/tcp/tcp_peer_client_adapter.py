@@ -0,0 +1,95 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : tcp_peer_client_adapter.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/15 15:40
+# tcp协议的peer client adapter, 消息格式见tcp_protocol
+#
+# send_tx不等待响应: 交易进入发往该邻居的批量, 由TCPClient的后台线程以TX_BATCH消息发送
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from ...types.core_types import Transaction, Block
+
+# local import
+from ..abstract.peer_client_adapter import PeerClientAdapter
+from ...exceptions import PeerClientAdapterProtocolError
+from ..common.peer import NetworkNodePeer
+from ...tools.binary_encoding import TX_SCHEMA, BLOCK_SCHEMA
+from .tcp_client import TCPClient
+from .tcp_protocol import (
+    MSG_ALIVE, MSG_JOIN, MSG_TX_BATCH, MSG_BLOCK, MSG_PEER,
+    MSG_GET_SUMMARY, MSG_GET_CHAIN, MSG_GET_HEADERS, MSG_GET_BLOCKS,
+    encode_json, decode_json, encode_record_list, decode_record_list
+)
+
+
+__all__ = ['TCPPeerClientAdapter']
+
+
+# 与邻居节点之间的请求超时时间(秒)
+PEER_REQUEST_TIMEOUT = 10
+
+tcp_client = TCPClient(timeout=PEER_REQUEST_TIMEOUT)
+
+
+class TCPPeerClientAdapter(PeerClientAdapter):
+    @property
+    def protocol(self) -> str:
+        return 'tcp'
+
+    def check_peer_protocol(self, peer: NetworkNodePeer):
+        if peer.protocol != self.protocol:
+            raise PeerClientAdapterProtocolError(f'peer: {peer.protocol}, adapter: {self.protocol}')
+
+    def alive(self, peer: NetworkNodePeer) -> bool:
+        self.check_peer_protocol(peer)
+        return decode_json(tcp_client.request(peer.addr, MSG_ALIVE))
+
+    def send_block(self, peer: NetworkNodePeer, block: Block):
+        self.check_peer_protocol(peer)
+        return decode_json(tcp_client.request(peer.addr, MSG_BLOCK, encode_record_list(BLOCK_SCHEMA, [block])))
+
+    def send_tx(self, peer: NetworkNodePeer, tx: Transaction):
+        self.check_peer_protocol(peer)
+        tcp_client.queue_tx(peer.addr, tx)
+        return True
+
+    def send_txs(self, peer: NetworkNodePeer, txs: list[Transaction]) -> dict | None:
+        """
+        立即以一个TX_BATCH消息发送一组交易
+
+        :return: {'accepted': 进入交易池的数量, 'rejected': 被拒绝的数量}
+        """
+        self.check_peer_protocol(peer)
+        return decode_json(tcp_client.request(peer.addr, MSG_TX_BATCH, encode_record_list(TX_SCHEMA, txs)))
+
+    def send_peer(self, peer: NetworkNodePeer, send_peer_info: NetworkNodePeer):
+        self.check_peer_protocol(peer)
+        return decode_json(tcp_client.request(peer.addr, MSG_PEER, encode_json(send_peer_info.serialize())))
+
+    def get_blockchain_summary(self, peer: NetworkNodePeer):
+        self.check_peer_protocol(peer)
+        return decode_json(tcp_client.request(peer.addr, MSG_GET_SUMMARY))
+
+    def get_blockchain_data(self, peer: NetworkNodePeer) -> list[dict]:
+        self.check_peer_protocol(peer)
+        return decode_record_list(tcp_client.request(peer.addr, MSG_GET_CHAIN), BLOCK_SCHEMA)
+
+    def get_headers(self, peer: NetworkNodePeer, locator: list[str], limit: int) -> dict | None:
+        self.check_peer_protocol(peer)
+        body = encode_json({'locator': locator, 'limit': limit})
+        return decode_json(tcp_client.request(peer.addr, MSG_GET_HEADERS, body))
+
+    def get_blocks(self, peer: NetworkNodePeer, start: int, end: int) -> list[dict] | None:
+        self.check_peer_protocol(peer)
+        body = encode_json({'from': start, 'to': end})
+        return decode_record_list(tcp_client.request(peer.addr, MSG_GET_BLOCKS, body), BLOCK_SCHEMA)
+
+    def join_network(self, peer: NetworkNodePeer, self_peer_info: NetworkNodePeer) -> list[NetworkNodePeer] | None:
+        self.check_peer_protocol(peer)
+        resp = decode_json(tcp_client.request(peer.addr, MSG_JOIN, encode_json(self_peer_info.serialize())))
+        if resp:
+            return [NetworkNodePeer.deserialize(pd) for pd in resp]
@@ -0,0 +1,132 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : tcp_protocol.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/15 14:20
+# 节点之间的二进制gossip协议(tcp)
+#
+# 节点之间保持长连接, 连接上传输长度前缀的消息帧:
+#   body长度(4B) | 消息类型(1B) | 请求id(4B) | body
+# 每个请求帧都有一个响应帧, 响应的消息类型为 请求类型 | RESPONSE_FLAG, 请求id与请求相同, 出错时为ERROR
+#
+# body编码:
+#   * 交易、区块: binary_encoding的记录列表, 数量(4B) | (记录长度(4B) | 记录)*, 不经过json
+#   * 其他消息(peer信息、链摘要、区块头、执行结果): json
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any, Iterable
+    from socket import socket
+    from ...tools.binary_encoding import RecordSchema
+
+# std import
+import json
+import struct
+
+# local import
+from ...tools.binary_encoding import get_encoder, decode_record
+from ...exceptions import TCPProtocolError
+
+
+__all__ = [
+    'MSG_ALIVE', 'MSG_JOIN', 'MSG_TX_BATCH', 'MSG_BLOCK', 'MSG_PEER',
+    'MSG_GET_SUMMARY', 'MSG_GET_CHAIN', 'MSG_GET_HEADERS', 'MSG_GET_BLOCKS',
+    'MSG_ERROR', 'RESPONSE_FLAG', 'MAX_FRAME_SIZE',
+    'encode_frame', 'read_frame', 'encode_json', 'decode_json', 'encode_record_list', 'decode_record_list'
+]
+
+
+# 消息类型
+MSG_ALIVE = 0x01
+MSG_JOIN = 0x02
+MSG_TX_BATCH = 0x03
+MSG_BLOCK = 0x04
+MSG_PEER = 0x05
+MSG_GET_SUMMARY = 0x06
+MSG_GET_CHAIN = 0x07
+MSG_GET_HEADERS = 0x08
+MSG_GET_BLOCKS = 0x09
+MSG_ERROR = 0x7F
+RESPONSE_FLAG = 0x80
+
+MAX_FRAME_SIZE = 64 * 1024 * 1024  # 单个消息帧body的最大大小
+
+_FRAME_HEADER = struct.Struct('>IBI')
+_U32 = struct.Struct('>I')
+
+
+def encode_frame(msg_type: int, request_id: int, body: bytes = b'') -> bytes:
+    return _FRAME_HEADER.pack(len(body), msg_type, request_id) + body
+
+
+def _recv_exactly(sock: socket, size: int) -> bytes:
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise TCPProtocolError("connection closed")
+        received += n
+    return bytes(buf)
+
+
+def read_frame(sock: socket) -> tuple[int, int, bytes]:
+    """
+    从socket中读取一个完整的消息帧
+
+    :return: (消息类型, 请求id, body)
+    """
+    length, msg_type, request_id = _FRAME_HEADER.unpack(_recv_exactly(sock, _FRAME_HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise TCPProtocolError(f"frame too large: {length}")
+    return msg_type, request_id, _recv_exactly(sock, length) if length else b''
+
+
+def encode_json(data: Any) -> bytes:
+    return json.dumps(data, sort_keys=True).encode()
+
+
+def decode_json(body: bytes) -> Any:
+    return json.loads(body) if body else None
+
+
+def encode_record_list(schema: RecordSchema, items: Iterable) -> bytes:
+    """
+    将多个对象(或dict)编码为记录列表
+    """
+    out = bytearray(4)
+    count = 0
+    encoder = get_encoder()
+    for item in items:
+        encoder.reset().write_record(schema, item)
+        out += _U32.pack(len(encoder.buffer))
+        out += encoder.buffer
+        count += 1
+    _U32.pack_into(out, 0, count)
+    return bytes(out)
+
+
+def decode_record_list(body: bytes, schema: RecordSchema) -> list[dict]:
+    """
+    解码记录列表, 所有记录必须为schema类型
+    """
+    view = memoryview(body)
+    (count,) = _U32.unpack_from(view, 0)
+    offset = _U32.size
+
+    records = []
+    for _ in range(count):
+        (length,) = _U32.unpack_from(view, offset)
+        offset += _U32.size
+        record_schema, record = decode_record(view[offset:offset + length])
+        if record_schema is not schema:
+            raise TCPProtocolError(f"unexpected record kind: {chr(record_schema.kind)}")
+        records.append(record)
+        offset += length
+
+    if offset != len(view):
+        raise TCPProtocolError("record list has trailing data")
+    return records
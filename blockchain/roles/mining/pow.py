@@ -1,5 +1,5 @@
 # std import
-from time import time
+from time import time, monotonic
 
 # 3rd import
 from loguru import logger
@@ -9,57 +9,148 @@ from blockchain.core.block import Block
 from blockchain.core.execute_result import ExecuteResult
 from blockchain.core.transaction import Transaction
 from blockchain.tools.http_client_json import JSONClient
+from blockchain.tools.hash_tools import set_hash_encoding
+from blockchain.roles.mining.pow_engine import MidstatePoWEngine, ParallelPoWSearcher
 
 
 json_client = JSONClient()
 
 
 class ProofOfWorkMining:
-    def __init__(self, miner_addr: str, node_addr: str):
+    def __init__(
+            self, miner_addr: str, node_addr: str, workers: int = 1,
+            stale_check_interval: float = 5.0, refresh_tx_growth: float = 0.5, refresh_tx_min: int = 10
+        ):
+        """
+        :param workers: 挖矿进程数, 大于1时启用多进程并行挖矿
+        :param stale_check_interval: 检查区块模板是否过期的间隔(秒)
+        :param refresh_tx_growth: 交易池的交易数量相对模板增长超过此比例时, 刷新区块模板
+        :param refresh_tx_min: 交易池的交易数量相对模板至少增长此数量时, 才会刷新区块模板
+        """
         self.miner_addr = miner_addr
         self.node_addr = node_addr
         self.pow_check_str = None
         self.difficulty = None
 
+        self.workers = workers
+        self.stale_check_interval = stale_check_interval
+        self.refresh_tx_growth = refresh_tx_growth
+        self.refresh_tx_min = refresh_tx_min
+        self.chunk_size = 10000  # 单进程挖矿时, 每搜索chunk_size个nonce检查一次模板是否过期
+        self.searcher = ParallelPoWSearcher(workers) if workers > 1 else None
+
     def get_difficulty(self):
         pow_difficulty = json_client.get(f"{self.node_addr}/pow_difficulty")
         self.pow_check_str = pow_difficulty['hash_startwith']
         self.difficulty = pow_difficulty['difficulty']
+        set_hash_encoding(pow_difficulty.get('hash_encoding', 'json'))
 
     def check_proof(self, block: Block) -> bool:
         if self.pow_check_str is None or self.difficulty is None:
             self.get_difficulty()
         return block.hash.startswith(self.pow_check_str)
 
-    def mine_block(self) -> Block | None:
+    def get_block_template(self) -> tuple[Block, dict] | None:
         """
-        :return:
+        从node获取区块模板
+
+        :return: (区块模板, 模板状态), 交易池无数据时返回None
         """
-        last_block: Block = Block.deserialize(json_client.get(f"{self.node_addr}/last_block"))
-        mining_data: list[Transaction] = [
-            Transaction.deserialize(td) for td in json_client.get(f"{self.node_addr}/mining_data/{self.miner_addr}")
-        ]
+        template_data = json_client.get(f"{self.node_addr}/mining_template/{self.miner_addr}")
+        # 交易的反序列化与区块模板的hash计算需要使用node的hash编码方式
+        set_hash_encoding(template_data.get('hash_encoding', 'json'))
+        mining_data: list[Transaction] = [Transaction.deserialize(td) for td in template_data['transactions']]
 
         if not mining_data:
-            logger.info(f"交易池数据为空")
             return None
 
-        nonce = 0
-        # 挖矿循环
+        self.pow_check_str = template_data['hash_startwith']
+        self.difficulty = template_data['difficulty']
+
+        # 区块模板, 挖矿过程中除nonce外保持不变
+        template = Block(
+            index=template_data['index'],
+            timestamp=int(time()),
+            transactions=mining_data,
+            nonce=0,
+            prev_hash=template_data['prev_hash'],
+            difficulty=self.difficulty
+        )
+        return template, template_data['state']
+
+    def mine_block(self) -> Block | None:
+        """
+        使用区块模板挖矿, 模板过期(链的tip变化或交易池明显增长)时获取新的模板重新开始
+
+        :return:
+        """
         while True:
-            block = Block(
-                index=last_block.index + 1 if last_block else 1,
-                timestamp=int(time()),
-                transactions=mining_data,
-                nonce=nonce,
-                prev_hash=last_block.hash if last_block else None,
-                difficulty=self.difficulty
-            )
+            res = self.get_block_template()
+            if res is None:
+                logger.info(f"交易池数据为空")
+                return None
+            template, template_state = res
+
+            # 挖矿循环
+            engine = MidstatePoWEngine.from_block(template, self.pow_check_str)
+            found = self._search(engine, should_abort=self._template_stale_checker(template_state))
+            if found is None:
+                logger.info(f"区块模板已过期, 获取新的模板重新开始挖矿, 原模板: {template_state['etag']}")
+                continue
+
+            nonce, _ = found
+            block = engine.build_block(template, nonce)
 
             if self.check_proof(block):
                 return block
 
-            nonce += 1
+            logger.error(f"挖矿引擎计算的hash与区块hash不一致, nonce: {nonce}")
+            return None
+
+    def _search(self, engine: MidstatePoWEngine, should_abort) -> tuple[int, str] | None:
+        if self.searcher is not None:
+            return self.searcher.search(engine, should_abort=should_abort)
+
+        start = 0
+        while True:
+            res = engine.search(start, start + self.chunk_size)
+            if res is not None:
+                return res
+            if should_abort():
+                return None
+            start += self.chunk_size
+
+    def _template_stale_checker(self, template_state: dict):
+        """
+        生成检查函数: 每隔stale_check_interval秒请求一次模板状态, 以下情况返回True(模板过期):
+            1. 链的tip与模板不一致
+            2. 交易池的交易数量相对模板明显增长
+        """
+        next_check = monotonic() + self.stale_check_interval
+        tx_count = template_state['tx_count']
+        refresh_tx_count = tx_count + max(self.refresh_tx_min, int(tx_count * self.refresh_tx_growth))
+
+        def checker() -> bool:
+            nonlocal next_check
+            if monotonic() < next_check:
+                return False
+            next_check = monotonic() + self.stale_check_interval
+
+            state = json_client.get(f"{self.node_addr}/mining_template/state")
+            if state is None:
+                return False
+
+            if state['tip_hash'] != template_state['tip_hash']:
+                logger.info(f"链的tip已变化: {template_state['tip_hash']} -> {state['tip_hash']}")
+                return True
+
+            if state['tx_count'] >= refresh_tx_count:
+                logger.info(f"交易池明显增长: {tx_count} -> {state['tx_count']}")
+                return True
+
+            return False
+
+        return checker
 
     def start_mining(self) -> ExecuteResult:
         block = self.mine_block()
@@ -67,4 +158,4 @@ class ProofOfWorkMining:
             return ExecuteResult(success=False, error_type=None, message="交易池无数据")
         else:
             logger.info(f"成功挖出区块: {block.summary.serialize()}")
-            return ExecuteResult.deserialize(json_client.post(f"{self.node_addr}/block", data=block.serialize()))
+            return ExecuteResult.deserialize(json_client.post_encoded(f"{self.node_addr}/block", payload=block.encoded()))
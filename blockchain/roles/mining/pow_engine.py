@@ -0,0 +1,226 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : pow_engine.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/6 10:12
+# 基于midstate的nonce搜索引擎
+#
+# 区块头在一次挖矿中除nonce外保持不变, 因此只编码一次, 以nonce为界切分为prefix/suffix,
+# prefix的sha256中间状态(midstate)预先计算好, 每次尝试只需copy midstate并追加nonce与suffix
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Callable
+
+# std import
+import time
+import hashlib
+import multiprocessing
+from itertools import count
+
+# 3rd import
+from loguru import logger
+
+# local import
+from ...core.block import Block
+from ...tools.hash_tools import split_hash_payload, encode_hash_int, get_hash_encoding
+from ...tools.binary_encoding import BLOCK_CORE_SCHEMA
+
+
+__all__ = ['MidstatePoWEngine', 'ParallelPoWSearcher']
+
+
+class MidstatePoWEngine:
+    """
+    对一个区块模板进行nonce搜索, 计算结果与Block.compute_hash完全一致
+    """
+    __slots__ = ['prefix', 'suffix', 'pow_check', 'encoding', '_midstate']
+
+    def __init__(self, prefix: bytes, suffix: bytes, pow_check: str, encoding: str | None = None):
+        """
+        :param encoding: hash编码方式, 子进程中不一定设置了链参数, 因此随引擎一起传递
+        """
+        self.prefix = prefix
+        self.suffix = suffix
+        self.pow_check = pow_check
+        self.encoding = encoding or get_hash_encoding()
+
+        self._midstate = hashlib.sha256(prefix)
+
+    @classmethod
+    def from_block(cls, block: Block, pow_check: str) -> "MidstatePoWEngine":
+        """
+        以区块为模板创建引擎, 模板的nonce值不参与计算
+        """
+        encoding = get_hash_encoding()
+        prefix, suffix = split_hash_payload(block.block_core_data(), 'nonce', BLOCK_CORE_SCHEMA, encoding)
+        return cls(prefix, suffix, pow_check, encoding)
+
+    def __reduce__(self):
+        # hashlib对象不可pickle, 序列化时只保留编码数据, 便于分发给子进程
+        return self.__class__, (self.prefix, self.suffix, self.pow_check, self.encoding)
+
+    def compute_hash(self, nonce: int) -> str:
+        h = self._midstate.copy()
+        h.update(encode_hash_int(nonce, self.encoding))
+        h.update(self.suffix)
+        return h.hexdigest()
+
+    def search(self, start: int = 0, stop: int | None = None) -> tuple[int, str] | None:
+        """
+        在[start, stop)范围内搜索满足pow_check的nonce, stop为None时不设上限
+
+        :return: (nonce, hash), 范围内未找到时返回None
+        """
+        # 热循环, 将属性访问提前到局部变量
+        midstate_copy = self._midstate.copy
+        suffix = self.suffix
+        pow_check = self.pow_check
+        encoding = self.encoding
+        encode_nonce = encode_hash_int
+
+        nonces = count(start) if stop is None else range(start, stop)
+        for nonce in nonces:
+            h = midstate_copy()
+            h.update(encode_nonce(nonce, encoding))
+            h.update(suffix)
+            block_hash = h.hexdigest()
+            if block_hash.startswith(pow_check):
+                return nonce, block_hash
+
+        return None
+
+    @staticmethod
+    def build_block(template: Block, nonce: int) -> Block:
+        """
+        以搜索到的nonce生成最终区块
+        """
+        return Block(
+            index=template.index,
+            timestamp=template.timestamp,
+            transactions=template.transactions,
+            nonce=nonce,
+            prev_hash=template.prev_hash,
+            difficulty=template.difficulty
+        )
+
+
+################################################
+# 多进程并行搜索
+################################################
+
+# 子进程内的共享状态, 由进程池的initializer设置
+_worker_stop_event = None
+_worker_hash_counter = None
+
+
+def _init_search_worker(stop_event, hash_counter):
+    global _worker_stop_event, _worker_hash_counter
+    _worker_stop_event = stop_event
+    _worker_hash_counter = hash_counter
+
+
+def _search_partition(engine: MidstatePoWEngine, offset: int, stride: int, chunk_size: int) -> tuple[int, str] | None:
+    """
+    子进程的搜索任务, nonce空间按chunk_size切块后交错分配:
+        第offset个worker负责第 offset, offset + stride, offset + 2 * stride ... 块
+    每搜索完一块检查一次取消标记
+    """
+    start = offset * chunk_size
+    while not _worker_stop_event.is_set():
+        res = engine.search(start, start + chunk_size)
+
+        with _worker_hash_counter.get_lock():
+            _worker_hash_counter.value += (res[0] - start + 1) if res else chunk_size
+
+        if res is not None:
+            _worker_stop_event.set()  # 通知其他worker停止
+            return res
+
+        start += stride * chunk_size
+
+    return None
+
+
+class ParallelPoWSearcher:
+    """
+    将nonce空间分配给多个进程并行搜索, 任意一个进程找到结果后取消其他进程
+    """
+    def __init__(self, workers: int, chunk_size: int = 10000, check_interval: float = 0.5):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.check_interval = check_interval  # 检查搜索结果及是否放弃搜索的间隔(秒)
+
+        self._stop_event = multiprocessing.Event()
+        self._hash_counter = multiprocessing.Value('Q', 0)
+        self._pool = None
+
+        # 最近一次搜索的统计数据
+        self.last_hashes = 0
+        self.last_elapsed = 0.0
+
+    @property
+    def last_hashrate(self) -> float:
+        """
+        最近一次搜索的总算力(H/s)
+        """
+        return self.last_hashes / self.last_elapsed if self.last_elapsed else 0.0
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(
+                processes=self.workers,
+                initializer=_init_search_worker,
+                initargs=(self._stop_event, self._hash_counter)
+            )
+        return self._pool
+
+    def search(self, engine: MidstatePoWEngine, should_abort: Callable[[], bool] | None = None) -> tuple[int, str] | None:
+        """
+        并行搜索, should_abort返回True时放弃本次搜索(例如链的tip已经变化)
+
+        :return: (nonce, hash), 放弃搜索时返回None
+        """
+        pool = self._get_pool()
+        self._stop_event.clear()
+        with self._hash_counter.get_lock():
+            self._hash_counter.value = 0
+
+        start_time = time.monotonic()
+        async_results = [
+            pool.apply_async(_search_partition, (engine, i, self.workers, self.chunk_size))
+            for i in range(self.workers)
+        ]
+
+        result = None
+        try:
+            while not self._stop_event.is_set():
+                if all(r.ready() for r in async_results):  # worker异常退出
+                    break
+                if should_abort is not None and should_abort():
+                    logger.info("放弃本次nonce搜索")
+                    break
+                self._stop_event.wait(self.check_interval)
+        finally:
+            self._stop_event.set()
+            for r in async_results:
+                res = r.get()
+                if res is not None and (result is None or res[0] < result[0]):
+                    result = res
+
+            self.last_elapsed = time.monotonic() - start_time
+            self.last_hashes = self._hash_counter.value
+
+        logger.info(
+            f"nonce搜索结束, workers: {self.workers}, hashes: {self.last_hashes}, "
+            f"耗时: {self.last_elapsed:.2f}s, 总算力: {self.last_hashrate:.0f} H/s"
+        )
+        return result
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
@@ -16,12 +16,18 @@ from ...core.blockchain import BlockChain
 from ...core.block import Block
 from ...core.tx_pool import TransactionPool
 from ...core.consensus import POWConsensus
+from ...core.block_template import BlockTemplateManager
+from ...core.block_store import BlockStore
+from ...core.tx_validator import ParallelTransactionValidator
 from ...network.common.peer import NetworkNodePeerRegistry
 from ...network.common.peer_client import PeerClient
+from ...network.common.async_peer_client import AsyncPeerClient
 from .scheduler import Scheduler
 from .task_queue import TaskQueue
 from .worker import Worker
+from ..mining.pow_engine import MidstatePoWEngine
 from ...tools.http_client_json import JSONClient
+from ...tools.hash_tools import set_hash_encoding
 from ...exceptions import TestingNexusAddrNotSpecifiedError
 from ...core.transaction import Transaction
 
@@ -38,10 +44,31 @@ class Node:
     3. api server
     4. scheduler
     """
-    def __init__(self, api: API, with_genesis_block: bool):
+    def __init__(
+            self, api: API, with_genesis_block: bool,
+            mempool_max_txs: int | None = None, mempool_max_bytes: int | None = None, block_max_txs: int | None = None,
+            data_dir: str | None = None, archive_depth: int | None = None,
+            validation_workers: int = 1, hash_encoding: str = 'json', broadcast_workers: int = 8,
+            async_peer_client: bool = False
+        ):
         """
         由于各个组件资源之间存在相互依赖的关系，这里的执行顺序不可以随意修改
+
+        :param mempool_max_txs: 交易池最多容纳的交易数量, None为不限制
+        :param mempool_max_bytes: 交易池最多容纳的交易数据大小(字节), None为不限制
+        :param block_max_txs: 每个区块最多打包的交易数量, None为不限制
+        :param data_dir: 区块数据的持久化目录, None为不持久化(仅保存在内存中)
+        :param archive_depth: 只在内存中保留距离链顶archive_depth以内的区块, 更早的区块按需从data_dir中加载,
+                              None为全部保留在内存中(需要配合data_dir使用)
+        :param validation_workers: 区块交易验签的进程数量, 1为在当前进程中串行验签
+        :param hash_encoding: hash计算时数据的编码方式(json/binary), 属于链参数, 同一网络中的节点必须一致
+        :param broadcast_workers: 广播区块、交易、peer时并发发送的线程数量
+        :param async_peer_client: 使用基于asyncio的PeerClient(需要aiohttp), 广播与链摘要轮询在一个事件循环中并发执行,
+                                  此时broadcast_workers无效
         """
+        # 链参数, 最先设置(后续创建的peer信息、区块都需要计算hash)
+        set_hash_encoding(hash_encoding)
+
         # 初始化peer_registry, 及其相关参数
         self.peer_registry: NetworkNodePeerRegistry = NetworkNodePeerRegistry()
         self.join_peer = False
@@ -54,12 +81,22 @@ class Node:
         self.worker = Worker(tq=self.task_queue)
 
         # 初始化peer_client，并建立绑定关系
-        self.peer_client = PeerClient()
+        if async_peer_client:
+            self.peer_client = AsyncPeerClient()
+        else:
+            self.peer_client = PeerClient(broadcast_workers=broadcast_workers)
         self.peer_client.set_node(self)
 
         # 初始化Core组件(最后初始化，它们依赖task_queue)
-        self.blockchain = BlockChain(current_node=self)
-        self.txpool = TransactionPool(current_node=self)
+        self.tx_validator = ParallelTransactionValidator(workers=validation_workers)
+        self.block_store = BlockStore(data_dir) if data_dir else None
+        self.blockchain = BlockChain(current_node=self, block_store=self.block_store, archive_depth=archive_depth)
+        self.txpool = TransactionPool(
+            current_node=self,
+            max_txs=mempool_max_txs, max_bytes=mempool_max_bytes, max_block_txs=block_max_txs
+        )
+        self.block_template = BlockTemplateManager(current_node=self)
+        self.blockchain.load_from_store()
         if with_genesis_block:
             self.generate_genesis_block()
 
@@ -100,6 +137,8 @@ class Node:
     def start_scheduler(self):
         self.scheduler.add_interval_job(self._scheduled_function_do_consensus_check, minutes=1, job_name="do_consensus_check")
         self.scheduler.add_interval_job(self._scheduled_function_do_ask_alive, seconds=30, job_name="do_ask_alive")
+        if self.block_store is not None:
+            self.scheduler.add_interval_job(self.block_store.sync, seconds=5, job_name="do_block_store_sync")
 
         self.scheduler.start()
         logger.info(f"Scheduler 启动")
@@ -146,20 +185,17 @@ class Node:
 
 
         # 执行pow的挖矿循环
-        nonce = 0
-        while True:
-            genesis_block = Block(
-                index = 1,
-                timestamp=int(time.time()),
-                transactions=[genesis_transaction],
-                nonce=nonce,
-                prev_hash=None,
-                difficulty=self.blockchain.pow_difficulty
-            )
-            nonce += 1
-
-            if genesis_block.hash.startswith(self.blockchain.pow_check):
-                break
+        template = Block(
+            index = 1,
+            timestamp=int(time.time()),
+            transactions=[genesis_transaction],
+            nonce=0,
+            prev_hash=None,
+            difficulty=self.blockchain.pow_difficulty
+        )
+        engine = MidstatePoWEngine.from_block(template, self.blockchain.pow_check)
+        nonce, _ = engine.search()
+        genesis_block = engine.build_block(template, nonce)
 
         logger.info(f"创世区块已创建 {genesis_block.serialize()}")
         genesis_block.mark_genesis()
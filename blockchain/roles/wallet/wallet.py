@@ -8,6 +8,7 @@ from loguru import logger
 from blockchain.core.transaction import Transaction
 from blockchain.tools.ecdsa_sign_tools import ECDSATool
 from blockchain.tools.http_client_json import JSONClient
+from blockchain.tools.hash_tools import set_hash_encoding
 
 
 json_client = JSONClient()
@@ -30,6 +31,11 @@ class Wallet:
             logger.info(f"登录到node: {node_addr}")
             self.node_addr = node_addr
 
+            # 交易hash的计算方式需要与node一致
+            chain_params = json_client.get(f"{node_addr}/chain_params")
+            if chain_params:
+                set_hash_encoding(chain_params['hash_encoding'])
+
     def logout(self):
         self.node_addr = None
 
@@ -52,7 +58,7 @@ class Wallet:
         # 对交易签名
         tx.sign(self.seckey)
 
-        return json_client.post(self.node_addr + '/transaction', data=tx.serialize())
+        return json_client.post_encoded(self.node_addr + '/transaction', payload=tx.encoded())
 
     def get_balance(self) -> int:
         """
@@ -0,0 +1,251 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : binary_encoding.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/12 20:10
+# 规范化二进制编码, 用于替代json参与hash计算
+#
+# 编码结构:
+#   version(1B) | record kind(1B) | 按schema固定顺序排列的字段值
+# 字段值以1字节的类型标记开头:
+#   NONE  0x00
+#   INT   0x01 | int64(8B, 大端)
+#   BIG   0x02 | 长度(4B) | 有符号大端整数   (超出int64范围的int)
+#   FLOAT 0x03 | float64(8B, 大端)
+#   STR   0x04 | 长度(4B) | utf-8
+#   LIST  0x05 | 元素数量(4B) | 元素(嵌套记录只包含字段值, 不包含version与kind)
+
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any
+
+# std import
+import struct
+import threading
+from operator import attrgetter
+
+
+__all__ = [
+    'ENCODING_VERSION', 'RecordSchema', 'BinaryEncoder', 'BinaryDecoder',
+    'TX_CORE_SCHEMA', 'TX_SCHEMA', 'BLOCK_CORE_SCHEMA', 'BLOCK_SCHEMA', 'PEER_CORE_SCHEMA',
+    'get_encoder', 'encode_record', 'decode_record', 'encode_int'
+]
+
+
+ENCODING_VERSION = 2  # 2: 区块头以merkle root代替交易列表
+
+TAG_NONE = 0x00
+TAG_INT = 0x01
+TAG_BIG = 0x02
+TAG_FLOAT = 0x03
+TAG_STR = 0x04
+TAG_LIST = 0x05
+
+_INT = struct.Struct('>bq')
+_FLOAT = struct.Struct('>bd')
+_SIZED = struct.Struct('>bI')
+_HEADER = struct.Struct('>BB')
+_U32 = struct.Struct('>I')
+_I64 = struct.Struct('>q')
+_F64 = struct.Struct('>d')
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def encode_int(value: int) -> bytes:
+    """
+    int值的编码, 用于挖矿时单独编码nonce
+    """
+    if _INT64_MIN <= value <= _INT64_MAX:
+        return _INT.pack(TAG_INT, value)
+
+    raw = value.to_bytes((value.bit_length() + 8) // 8, 'big', signed=True)
+    return _SIZED.pack(TAG_BIG, len(raw)) + raw
+
+
+class RecordSchema:
+    """
+    记录的字段顺序, nested为LIST字段中元素的schema
+    """
+    __slots__ = ['kind', 'fields', 'nested', 'nested_at', 'getter']
+
+    def __init__(self, kind: bytes, fields: tuple[str, ...], nested: dict[str, RecordSchema] | None = None):
+        self.kind = kind[0]
+        self.fields = fields
+        self.nested = nested or {}
+        # 按字段下标索引的嵌套schema, 编码时避免按字段名查找
+        self.nested_at = tuple(self.nested.get(f, None) for f in fields)
+        self.getter = attrgetter(*fields) if len(fields) > 1 else (lambda o, _f=fields[0]: (getattr(o, _f),))
+
+    def values(self, source: Any) -> tuple:
+        """
+        按字段顺序取出source(dict或对象)的字段值
+        """
+        if isinstance(source, dict):
+            return tuple(source.get(f, None) for f in self.fields)
+        return self.getter(source)
+
+
+class BinaryEncoder:
+    """
+    将记录编码到可复用的缓冲区中, 同一个encoder不可以在多个线程中同时使用
+    """
+    __slots__ = ['buffer']
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def reset(self) -> "BinaryEncoder":
+        del self.buffer[:]
+        return self
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+    def write_values(self, values: tuple | list, nested_at: tuple | None = None):
+        """
+        依次写入字段值, 热路径, 常见类型(str/int/None)按type直接判断
+        """
+        buf = self.buffer
+        pack_sized = _SIZED.pack
+        pack_int = _INT.pack
+
+        for i, value in enumerate(values):
+            t = type(value)
+            if t is str:
+                raw = value.encode()
+                buf += pack_sized(TAG_STR, len(raw))
+                buf += raw
+            elif value is None:
+                buf.append(TAG_NONE)
+            elif t is int and _INT64_MIN <= value <= _INT64_MAX:
+                buf += pack_int(TAG_INT, value)
+            elif isinstance(value, (list, tuple)):
+                buf += pack_sized(TAG_LIST, len(value))
+                nested = nested_at[i] if nested_at is not None else None
+                if nested is not None:
+                    for item in value:
+                        self.write_values(nested.values(item), nested.nested_at)
+                else:
+                    self.write_values(value)
+            elif isinstance(value, int):
+                buf += encode_int(value)
+            elif isinstance(value, float):
+                buf += _FLOAT.pack(TAG_FLOAT, value)
+            else:
+                raise TypeError(f"unsupported type for binary encoding: {type(value).__name__}")
+
+    def write_fields(self, schema: RecordSchema, source: Any):
+        """
+        按schema的字段顺序写入source(dict或对象)的字段值
+        """
+        self.write_values(schema.values(source), schema.nested_at)
+
+    def write_header(self, schema: RecordSchema):
+        self.buffer += _HEADER.pack(ENCODING_VERSION, schema.kind)
+
+    def write_record(self, schema: RecordSchema, source: Any) -> "BinaryEncoder":
+        self.write_header(schema)
+        self.write_fields(schema, source)
+        return self
+
+
+class BinaryDecoder:
+    __slots__ = ['data', 'pos']
+
+    def __init__(self, data: bytes | bytearray | memoryview):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def _read(self, size: int) -> memoryview:
+        end = self.pos + size
+        if end > len(self.data):
+            raise ValueError("binary record is truncated")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def read_value(self, nested: RecordSchema | None = None) -> Any:
+        tag = self._read(1)[0]
+
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_INT:
+            return _I64.unpack(self._read(8))[0]
+        if tag == TAG_FLOAT:
+            return _F64.unpack(self._read(8))[0]
+        if tag == TAG_BIG:
+            size = _U32.unpack(self._read(4))[0]
+            return int.from_bytes(self._read(size), 'big', signed=True)
+        if tag == TAG_STR:
+            size = _U32.unpack(self._read(4))[0]
+            return str(self._read(size), 'utf-8')
+        if tag == TAG_LIST:
+            count = _U32.unpack(self._read(4))[0]
+            if nested is not None:
+                return [self.read_fields(nested) for _ in range(count)]
+            return [self.read_value() for _ in range(count)]
+
+        raise ValueError(f"unknown binary encoding tag: {tag}")
+
+    def read_fields(self, schema: RecordSchema) -> dict:
+        return {f: self.read_value(nested) for f, nested in zip(schema.fields, schema.nested_at)}
+
+    def read_record(self) -> tuple[RecordSchema, dict]:
+        version, kind = _HEADER.unpack(self._read(_HEADER.size))
+        if version != ENCODING_VERSION:
+            raise ValueError(f"unsupported binary encoding version: {version}")
+
+        schema = SCHEMAS.get(kind, None)
+        if schema is None:
+            raise ValueError(f"unknown binary record kind: {kind}")
+
+        return schema, self.read_fields(schema)
+
+
+## schemas, 字段顺序一经确定不可修改(修改需要提升ENCODING_VERSION)
+# 交易: 参与交易hash计算的字段
+TX_CORE_SCHEMA = RecordSchema(b'T', ('saddr', 'raddr', 'amount', 'timestamp'))
+# 交易: 完整字段
+TX_SCHEMA = RecordSchema(b't', ('saddr', 'raddr', 'amount', 'timestamp', 'hash', 'signature'))
+# 区块: 参与区块hash计算的字段(区块头)
+BLOCK_CORE_SCHEMA = RecordSchema(b'B', ('index', 'timestamp', 'merkle_root', 'nonce', 'prev_hash', 'difficulty'))
+# 区块: 完整字段
+BLOCK_SCHEMA = RecordSchema(
+    b'b', ('index', 'timestamp', 'transactions', 'merkle_root', 'nonce', 'prev_hash', 'hash', 'difficulty'),
+    nested={'transactions': TX_SCHEMA}
+)
+# peer: 参与peer hash计算的字段
+PEER_CORE_SCHEMA = RecordSchema(b'P', ('protocol', 'addr'))
+
+SCHEMAS: dict[int, RecordSchema] = {
+    s.kind: s for s in (TX_CORE_SCHEMA, TX_SCHEMA, BLOCK_CORE_SCHEMA, BLOCK_SCHEMA, PEER_CORE_SCHEMA)
+}
+
+
+_local = threading.local()
+
+
+def get_encoder() -> BinaryEncoder:
+    """
+    获取当前线程复用的encoder(已清空)
+    """
+    encoder = getattr(_local, 'encoder', None)
+    if encoder is None:
+        encoder = _local.encoder = BinaryEncoder()
+    return encoder.reset()
+
+
+def encode_record(schema: RecordSchema, source: Any) -> bytes:
+    return get_encoder().write_record(schema, source).getvalue()
+
+
+def decode_record(data: bytes | bytearray | memoryview) -> tuple[RecordSchema, dict]:
+    decoder = BinaryDecoder(data)
+    schema, record = decoder.read_record()
+    if decoder.pos != len(decoder.data):
+        raise ValueError("binary record has trailing data")
+    return schema, record
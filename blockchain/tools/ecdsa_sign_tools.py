@@ -3,62 +3,328 @@ from typing import Any
 
 # std import
 import base64
+import hashlib
+from abc import ABC, abstractmethod
 
 # 3rd import
 import ecdsa
+from ecdsa.util import sigencode_der
+from ecdsa.ellipticcurve import PointJacobi
+from loguru import logger
 
 # local import
 from .hash_tools import compute_hash
+from .lru_cache import LRUCache
+
+
+__all__ = [
+    'ECDSATool', 'ECDSABackend', 'select_backend',
+    'ECDSAToolNotFoundPublicKeyError', 'ECDSAToolNotFoundPrivateKeyError', 'ECDSABackendNotAvailableError'
+]
 
 
 class ECDSAToolNotFoundPublicKeyError(Exception): pass
 class ECDSAToolNotFoundPrivateKeyError(Exception): pass
+class ECDSABackendNotAvailableError(Exception): pass
+
+
+CURVE_ORDER = ecdsa.SECP256k1.order
+SIGNATURE_SIZE = 64  # r || s, 各32字节
+
+
+def _split_signature(signature: bytes) -> tuple[int, int] | None:
+    """
+    拆分 r || s 格式的签名, 格式或取值范围不合法时返回None
+    """
+    if len(signature) != SIGNATURE_SIZE:
+        return None
+
+    r = int.from_bytes(signature[:32], 'big')
+    s = int.from_bytes(signature[32:], 'big')
+    if not (0 < r < CURVE_ORDER and 0 < s < CURVE_ORDER):
+        return None
+    return r, s
+
+
+def _sha1_digest_32(data: bytes) -> bytes:
+    """
+    sha1摘要左侧补0到32字节, 两者对应的整数相同, 因此与ecdsa库使用sha1签名的结果兼容
+    """
+    return hashlib.sha1(data).digest().rjust(32, b'\x00')
+
+
+class ECDSABackend(ABC):
+    """
+    签名算法的实现, 所有实现的格式保持一致:
+        公钥: 64字节 x || y
+        私钥: 32字节
+        签名: secp256k1 + sha1, 64字节 r || s
+    """
+    name: str = None
+
+    @abstractmethod
+    def generate_keys(self) -> tuple[bytes, bytes]:
+        """
+        :return: (公钥, 私钥)
+        """
+        pass
+
+    @abstractmethod
+    def load_verifying_key(self, public_key: bytes) -> Any:
+        pass
+
+    @abstractmethod
+    def load_signing_key(self, secret_key: bytes) -> Any:
+        pass
+
+    def optimize_verifying_key(self, vk: Any) -> Any:
+        """
+        公钥被重复使用时调用, 可以在此进行预计算
+        """
+        return vk
+
+    @abstractmethod
+    def sign(self, sk: Any, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def verify(self, vk: Any, signature: bytes, data: bytes) -> bool:
+        pass
+
+
+class _EcdsaBackend(ECDSABackend):
+    """
+    纯python实现, 作为兜底
+    """
+    name = 'ecdsa'
+    curve = ecdsa.SECP256k1
+
+    def generate_keys(self) -> tuple[bytes, bytes]:
+        sk = ecdsa.SigningKey.generate(curve=self.curve)
+        return sk.get_verifying_key().to_string(), sk.to_string()
+
+    def load_verifying_key(self, public_key: bytes) -> ecdsa.VerifyingKey:
+        return ecdsa.VerifyingKey.from_string(public_key, curve=self.curve)
+
+    def load_signing_key(self, secret_key: bytes) -> ecdsa.SigningKey:
+        return ecdsa.SigningKey.from_string(secret_key, curve=self.curve)
+
+    def optimize_verifying_key(self, vk: ecdsa.VerifyingKey) -> ecdsa.VerifyingKey:
+        # 开启预计算, 验签速度约提升2倍
+        # from_string得到的点不携带阶, 无法直接预计算, 需要先补上曲线的阶
+        pt = vk.pubkey.point
+        vk.pubkey.point = PointJacobi(self.curve.curve, pt.x(), pt.y(), 1, self.curve.order)
+        vk.precompute()
+        return vk
+
+    def sign(self, sk: ecdsa.SigningKey, data: bytes) -> bytes:
+        return sk.sign(data)
+
+    def verify(self, vk: ecdsa.VerifyingKey, signature: bytes, data: bytes) -> bool:
+        if _split_signature(signature) is None:
+            return False
+
+        try:
+            return vk.verify(signature, data)
+        except ecdsa.BadSignatureError:
+            return False
+
+
+class _CryptographyBackend(ECDSABackend):
+    """
+    基于OpenSSL
+    """
+    name = 'cryptography'
+
+    def __init__(self):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+
+        self._ec = ec
+        self._curve = ec.SECP256K1()
+        self._algorithm = ec.ECDSA(hashes.SHA1())
+        self._invalid_signature = InvalidSignature
+        self._decode_dss_signature = decode_dss_signature
+        self._encode_dss_signature = encode_dss_signature
+        self._encoding = serialization.Encoding.X962
+        self._point_format = serialization.PublicFormat.UncompressedPoint
+
+    def generate_keys(self) -> tuple[bytes, bytes]:
+        sk = self._ec.generate_private_key(self._curve)
+        public_key = sk.public_key().public_bytes(self._encoding, self._point_format)[1:]
+        return public_key, sk.private_numbers().private_value.to_bytes(32, 'big')
+
+    def load_verifying_key(self, public_key: bytes):
+        return self._ec.EllipticCurvePublicKey.from_encoded_point(self._curve, b'\x04' + public_key)
+
+    def load_signing_key(self, secret_key: bytes):
+        return self._ec.derive_private_key(int.from_bytes(secret_key, 'big'), self._curve)
+
+    def sign(self, sk, data: bytes) -> bytes:
+        r, s = self._decode_dss_signature(sk.sign(data, self._algorithm))
+        return r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+
+    def verify(self, vk, signature: bytes, data: bytes) -> bool:
+        rs = _split_signature(signature)
+        if rs is None:
+            return False
+
+        try:
+            vk.verify(self._encode_dss_signature(*rs), data, self._algorithm)
+            return True
+        except self._invalid_signature:
+            return False
+
+
+class _CoincurveBackend(ECDSABackend):
+    """
+    基于libsecp256k1
+    """
+    name = 'coincurve'
+
+    def __init__(self):
+        import coincurve
+
+        self._private_key_cls = coincurve.PrivateKey
+        self._public_key_cls = coincurve.PublicKey
+
+    def generate_keys(self) -> tuple[bytes, bytes]:
+        sk = self._private_key_cls()
+        return sk.public_key.format(compressed=False)[1:], sk.secret
+
+    def load_verifying_key(self, public_key: bytes):
+        return self._public_key_cls(b'\x04' + public_key)
+
+    def load_signing_key(self, secret_key: bytes):
+        return self._private_key_cls(secret_key)
+
+    def sign(self, sk, data: bytes) -> bytes:
+        # 可恢复签名的格式为 r || s || recovery id
+        return sk.sign_recoverable(data, hasher=_sha1_digest_32)[:SIGNATURE_SIZE]
+
+    def verify(self, vk, signature: bytes, data: bytes) -> bool:
+        rs = _split_signature(signature)
+        if rs is None:
+            return False
+
+        # libsecp256k1只接受low-S签名, 而ecdsa库生成的签名s可能大于n/2,
+        # (r, s)与(r, n - s)同时有效, 验签前统一转换为low-S
+        r, s = rs
+        if s > CURVE_ORDER // 2:
+            s = CURVE_ORDER - s
+
+        return vk.verify(sigencode_der(r, s, CURVE_ORDER), data, hasher=_sha1_digest_32)
+
+
+BACKENDS: dict[str, type[ECDSABackend]] = {
+    b.name: b for b in (_CoincurveBackend, _CryptographyBackend, _EcdsaBackend)
+}
+BACKEND_PREFERENCE = ('coincurve', 'cryptography', 'ecdsa')
+
+
+def select_backend(name: str | None = None) -> ECDSABackend:
+    """
+    :param name: 指定的实现, None为按BACKEND_PREFERENCE顺序选择第一个可用的实现
+    """
+    if name is not None:
+        if name not in BACKENDS:
+            raise ECDSABackendNotAvailableError(f"unknown ecdsa backend: {name}")
+        try:
+            return BACKENDS[name]()
+        except ImportError as e:
+            raise ECDSABackendNotAvailableError(f"ecdsa backend {name} is not installed") from e
+
+    for n in BACKEND_PREFERENCE:
+        try:
+            return BACKENDS[n]()
+        except ImportError:
+            continue
+
+    raise ECDSABackendNotAvailableError("no ecdsa backend available")
 
 
 class ECDSATool:
     curve = ecdsa.SECP256k1
+    backend: ECDSABackend = select_backend()
+
+    # 同一地址的公钥/私钥会被反复使用, 缓存解析后的key对象
+    # 公钥缓存的value为 [key对象, 是否已优化(预计算)]
+    verifying_key_cache = LRUCache(4096)
+    signing_key_cache = LRUCache(64)
+
+    @classmethod
+    def set_backend(cls, name: str | None = None):
+        """
+        切换签名算法的实现, 已缓存的key对象属于旧的实现, 一并清除
+        """
+        cls.backend = select_backend(name)
+        cls.verifying_key_cache.clear()
+        cls.signing_key_cache.clear()
+        logger.info(f"ECDSA backend: {cls.backend.name}")
 
     @classmethod
     def generate_keys(cls) -> dict:
         """
         :return: keys info
         """
-        sk = ecdsa.SigningKey.generate(curve=cls.curve)
-        vk = sk.get_verifying_key()
+        pub, sec = cls.backend.generate_keys()
 
         return {
-            'pub': vk.to_string().hex(),
-            'sec': sk.to_string().hex()
+            'pub': pub.hex(),
+            'sec': sec.hex()
         }
 
-    def __init__(self, public_key: str = None, secret_key: str = None):
-        if public_key:
-            self.pubkey = ecdsa.VerifyingKey.from_string(bytes.fromhex(public_key), curve=self.curve)
-        else:
-            self.pubkey = None
+    @classmethod
+    def load_verifying_key(cls, public_key: str) -> Any:
+        """
+        从缓存中获取公钥对象, 同一公钥第二次被使用时(重复的交易发送方)进行优化(预计算)
+        """
+        entry = cls.verifying_key_cache.get(public_key)
+        if entry is None:
+            vk = cls.backend.load_verifying_key(bytes.fromhex(public_key))
+            cls.verifying_key_cache.put(public_key, [vk, False])
+            return vk
 
-        if secret_key:
-            self.seckey = ecdsa.SigningKey.from_string(bytes.fromhex(secret_key), curve=self.curve)
-        else:
-            self.seckey = None
+        vk, optimized = entry
+        if not optimized:
+            entry[0] = vk = cls.backend.optimize_verifying_key(vk)
+            entry[1] = True
+        return vk
+
+    @classmethod
+    def load_signing_key(cls, secret_key: str) -> Any:
+        sk = cls.signing_key_cache.get(secret_key)
+        if sk is None:
+            sk = cls.backend.load_signing_key(bytes.fromhex(secret_key))
+            cls.signing_key_cache.put(secret_key, sk)
+        return sk
+
+    @classmethod
+    def key_cache_info(cls) -> dict:
+        return {
+            'verifying_key': cls.verifying_key_cache.info(),
+            'signing_key': cls.signing_key_cache.info(),
+        }
+
+    def __init__(self, public_key: str = None, secret_key: str = None):
+        self.pubkey = self.load_verifying_key(public_key) if public_key else None
+        self.seckey = self.load_signing_key(secret_key) if secret_key else None
 
     def sign_data(self, data: bytes) -> str:
         if not self.seckey:
             raise ECDSAToolNotFoundPrivateKeyError
 
-        sk: ecdsa.SigningKey = self.seckey
-
-        signature = sk.sign(data)
+        signature = self.backend.sign(self.seckey, data)
         return base64.b64encode(signature).decode()
 
     def verify_sign_data(self, signature_b64: str, data: bytes) -> bool:
         if not self.pubkey:
             raise ECDSAToolNotFoundPublicKeyError
 
-        pk: ecdsa.VerifyingKey = self.pubkey
-
         try:
             signature = base64.b64decode(signature_b64)
-            return pk.verify(signature, data)
-        except ecdsa.BadSignatureError:
+        except ValueError:
             return False
+        return self.backend.verify(self.pubkey, signature, data)
@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : encoding_convert.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/12 22:30
+# 区块数据在json与二进制编码之间的转换工具
+#
+# json文件: 序列化后的区块列表(即GET /blockchain的返回数据)
+# 二进制文件: 连续存放的 长度(4B) | 区块记录(BLOCK_SCHEMA)
+# 输入为目录时, 视为--data-dir, 从区块存储中读取
+#
+# 转换只改变数据的存放格式, 不会重新计算hash(hash依赖签名与PoW, 无法在转换时重新生成),
+# 因此以某一种hash编码方式产生的链, 只能在同样hash编码方式的网络中使用
+#
+# python -m blockchain.tools.encoding_convert to-binary blockchain.json blockchain.bin
+# python -m blockchain.tools.encoding_convert to-json blockchain.bin blockchain.json
+
+# std import
+import os
+import sys
+import json
+import struct
+import argparse
+
+# local import
+from .binary_encoding import BLOCK_SCHEMA, encode_record, decode_record
+
+
+__all__ = ['blocks_to_binary', 'binary_to_blocks']
+
+
+_LENGTH = struct.Struct('>I')
+
+
+def blocks_to_binary(blocks: list[dict]) -> bytes:
+    out = bytearray()
+    for block_data in blocks:
+        record = encode_record(BLOCK_SCHEMA, block_data)
+        # 转换前后数据必须完全一致
+        if decode_record(record)[1] != {f: block_data.get(f, None) for f in BLOCK_SCHEMA.fields}:
+            raise ValueError(f"区块数据无法无损转换: {block_data.get('hash', None)}")
+
+        out += _LENGTH.pack(len(record))
+        out += record
+    return bytes(out)
+
+
+def binary_to_blocks(data: bytes) -> list[dict]:
+    blocks = []
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        (length,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+
+        schema, block_data = decode_record(view[offset:offset + length])
+        if schema is not BLOCK_SCHEMA:
+            raise ValueError(f"偏移量{offset}处的记录不是区块")
+        blocks.append(block_data)
+        offset += length
+
+    return blocks
+
+
+def _load_json_blocks(src: str) -> list[dict]:
+    if os.path.isdir(src):
+        from ..core.block_store import BlockStore
+        store = BlockStore(src)
+        try:
+            return list(store.iter_blocks())
+        finally:
+            store.close()
+
+    with open(src, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Convert block data between json and binary encoding.")
+    parser.add_argument("direction", choices=("to-binary", "to-json"))
+    parser.add_argument("src", help="source file (or --data-dir directory for to-binary)")
+    parser.add_argument("dst", help="destination file")
+    args = parser.parse_args(argv)
+
+    if args.direction == "to-binary":
+        blocks = _load_json_blocks(args.src)
+        data = blocks_to_binary(blocks)
+        with open(args.dst, 'wb') as f:
+            f.write(data)
+        json_size = sum(len(json.dumps(b, sort_keys=True)) for b in blocks)
+        print(f"blocks: {len(blocks)}, json: {json_size} bytes, binary: {len(data)} bytes")
+    else:
+        with open(args.src, 'rb') as f:
+            blocks = binary_to_blocks(f.read())
+        with open(args.dst, 'w', encoding='utf-8') as f:
+            json.dump(blocks, f, sort_keys=True)
+        print(f"blocks: {len(blocks)}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
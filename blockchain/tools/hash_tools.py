@@ -1,8 +1,41 @@
+# types hint
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import Any
+    from .binary_encoding import RecordSchema
+
+# std import
 import json
 import hashlib
 
+# local import
+from .binary_encoding import BinaryEncoder, get_encoder, encode_int
+
+
+__all__ = [
+    'HASH_ENCODINGS', 'set_hash_encoding', 'get_hash_encoding',
+    'compute_hash', 'compute_binary_hash', 'split_hash_payload', 'encode_hash_int'
+]
+
+
+# 切分hash数据时使用的占位值, 不会出现在正常的区块头数据中
+_SPLIT_PLACEHOLDER = '__hash_payload_split_placeholder__'
+
+# hash计算时数据的编码方式, 属于链参数, 同一网络中的所有节点、矿工、钱包必须一致
+HASH_ENCODINGS = ('json', 'binary')
+_hash_encoding = 'json'
+
+
+def set_hash_encoding(encoding: str):
+    global _hash_encoding
+    if encoding not in HASH_ENCODINGS:
+        raise ValueError(f"unknown hash encoding: {encoding}, all supported: {HASH_ENCODINGS}")
+    _hash_encoding = encoding
 
-__all__ = ['compute_hash']
+
+def get_hash_encoding() -> str:
+    return _hash_encoding
 
 
 def compute_hash(data: dict) -> str:
@@ -15,3 +48,57 @@ def compute_hash(data: dict) -> str:
     """
     data_json = json.dumps(data, sort_keys=True).encode()
     return hashlib.sha256(data_json).hexdigest()
+
+
+def compute_binary_hash(schema: RecordSchema, source: Any) -> str:
+    """
+    计算数据的二进制编码hash, 直接读取对象(或dict)的字段, 不需要构建dict与json
+    """
+    encoder = get_encoder().write_record(schema, source)
+    return hashlib.sha256(encoder.buffer).hexdigest()
+
+
+def split_hash_payload(data: dict, key: str, schema: RecordSchema | None = None, encoding: str | None = None) -> tuple[bytes, bytes]:
+    """
+    以data中key字段的值为界, 将参与hash计算的编码数据切分为前缀、后缀两段, 满足:
+        sha256(prefix + encode_hash_int(data[key]) + suffix) == 数据的hash
+
+    用于挖矿时只对nonce重新编码, 其余部分只编码一次
+
+    :param data: 字典类型的数据
+    :param key: 切分字段, 其值必须为int
+    :param schema: 二进制编码时数据的schema
+    :param encoding: hash编码方式, None为当前的编码方式
+    :return: (prefix, suffix)
+    """
+    if (encoding or _hash_encoding) == 'binary':
+        if schema is None or key not in schema.fields:
+            raise ValueError(f"无法切分hash数据, key: {key}")
+
+        index = schema.fields.index(key)
+        values = schema.values(data)
+
+        encoder = BinaryEncoder()
+        encoder.write_header(schema)
+        encoder.write_values(values[:index], schema.nested_at[:index])
+        prefix = encoder.getvalue()
+        encoder.reset().write_values(values[index + 1:], schema.nested_at[index + 1:])
+        return prefix, encoder.getvalue()
+
+    payload = json.dumps({**data, key: _SPLIT_PLACEHOLDER}, sort_keys=True).encode()
+    prefix, sep, suffix = payload.partition(json.dumps(_SPLIT_PLACEHOLDER).encode())
+    if not sep:
+        raise ValueError(f"无法切分hash数据, key: {key}")
+
+    return prefix, suffix
+
+
+def encode_hash_int(value: int, encoding: str | None = None) -> bytes:
+    """
+    int值在hash数据中的编码, 与compute_hash/compute_binary_hash保持一致
+
+    :param encoding: hash编码方式, None为当前的编码方式
+    """
+    if (encoding or _hash_encoding) == 'binary':
+        return encode_int(value)
+    return str(value).encode()
@@ -4,17 +4,82 @@
 # @Author : Xavier Wu
 # @Date   : 2025/8/3 14:49
 # 统一执行网络请求，其他的模块如需发送网络请求需经过JSONClient
+#
+# 每个目标host使用一个带连接池的requests.Session(keep-alive), 所有JSONClient实例共享,
+# 稳定运行时与邻居节点、node之间的请求复用已建立的TCP连接
 
 # std import
 import json
+import threading
+from urllib.parse import urlsplit
 
 # 3rd import
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class JSONClient:
+    # (scheme, host, 连接池配置) -> Session, 所有实例共享
+    _sessions: dict[tuple, requests.Session] = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(
+            self, connect_timeout: float | None = 3.05, read_timeout: float | None = 30,
+            pool_size: int = 10, retries: int = 2, backoff_factor: float = 0.2
+        ):
+        """
+        :param connect_timeout: 建立连接的超时时间(秒), None为不超时
+        :param read_timeout: 等待响应的超时时间(秒), None为不超时
+        :param pool_size: 每个host的连接池大小
+        :param retries: 请求失败的重试次数, 连接失败时所有请求都会重试, 读取超时与5xx状态码只重试GET请求(POST请求不保证幂等)
+        :param backoff_factor: 重试的退避时间系数, 第n次重试前等待 backoff_factor * 2^(n-1) 秒
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+    def _new_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries, connect=self.retries, read=self.retries, status=self.retries,
+            backoff_factor=self.backoff_factor, status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET'}), raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def session(self, url: str) -> requests.Session:
+        """
+        获取url所在host的共享Session
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc, self.pool_size, self.retries, self.backoff_factor)
+
+        session = self._sessions.get(key, None)
+        if session is None:
+            with self._sessions_lock:
+                session = self._sessions.get(key, None)
+                if session is None:
+                    session = self._sessions[key] = self._new_session()
+        return session
+
+    @classmethod
+    def close_sessions(cls):
+        """
+        关闭所有共享Session的连接
+        """
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
+
     def get(self, url):
-        req: requests.Response = requests.get(url)
+        req: requests.Response = self.session(url).get(url, timeout=self.timeout)
         if req.ok:
             return req.json()
 
@@ -22,8 +87,14 @@ class JSONClient:
 
     def post(self, url, data):
         data = json.dumps(data, sort_keys=True)
+        return self.post_encoded(url, data.encode())
+
+    def post_encoded(self, url, payload: bytes):
+        """
+        发送已编码的json数据(例如区块、交易缓存的编码数据), 不再重复编码
+        """
         headers = {"Content-Type": "application/json"}
-        req: requests.Response = requests.post(url, data=data, headers=headers)
+        req: requests.Response = self.session(url).post(url, data=payload, headers=headers, timeout=self.timeout)
         if req.ok:
             return req.json()
 
@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : merkle_tools.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/13 16:40
+# 交易的Merkle树
+#
+# 叶子节点与中间节点使用不同的前缀计算hash(同RFC 6962), 避免以中间节点伪造叶子节点:
+#   leaf = sha256(0x00 | 交易hash | 交易签名)
+#   node = sha256(0x01 | left | right)
+# 某一层节点数量为奇数时, 最后一个节点直接提升到上一层(不复制), 避免同一个root对应多组交易
+
+# std import
+import hashlib
+
+
+__all__ = ['merkle_leaf', 'merkle_root', 'merkle_levels', 'merkle_proof', 'verify_merkle_proof', 'EMPTY_MERKLE_ROOT']
+
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+EMPTY_MERKLE_ROOT = hashlib.sha256(b'').hexdigest()
+
+
+def merkle_leaf(tx_hash: str, signature: str | None) -> bytes:
+    """
+    交易的叶子节点, 签名同样参与计算, 使区块hash覆盖交易的签名
+    """
+    return hashlib.sha256(LEAF_PREFIX + tx_hash.encode() + (signature or '').encode()).digest()
+
+
+def _parent(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_levels(leaves: list[bytes]) -> list[list[bytes]]:
+    """
+    :return: 由叶子到root的每一层节点
+    """
+    levels = [leaves]
+    level = leaves
+    while len(level) > 1:
+        upper = [_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            upper.append(level[-1])
+        levels.append(upper)
+        level = upper
+
+    return levels
+
+
+def merkle_root(leaves: list[bytes]) -> str:
+    if not leaves:
+        return EMPTY_MERKLE_ROOT
+
+    return merkle_levels(leaves)[-1][0].hex()
+
+
+def merkle_proof(leaves: list[bytes], index: int) -> list[list[str]]:
+    """
+    生成第index个叶子的包含证明
+
+    :return: 由叶子到root的兄弟节点列表, 每一项为 [兄弟节点位置('left'/'right'), 兄弟节点hex]
+             被直接提升的层没有兄弟节点, 不出现在证明中
+    """
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"merkle leaf index out of range: {index}")
+
+    proof = []
+    for level in merkle_levels(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(['left' if sibling < index else 'right', level[sibling].hex()])
+        index //= 2
+
+    return proof
+
+
+def verify_merkle_proof(tx_hash: str, signature: str | None, proof: list[list[str]], root: str) -> bool:
+    node = merkle_leaf(tx_hash, signature)
+    for position, sibling_hex in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        node = _parent(sibling, node) if position == 'left' else _parent(node, sibling)
+
+    return node.hex() == root
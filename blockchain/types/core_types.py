@@ -8,5 +8,8 @@ if TYPE_CHECKING:
     from ..core.transaction import Transaction
     from ..core.tx_pool import TransactionPool
     from ..core.consensus import POWConsensus
+    from ..core.block_template import BlockTemplateManager
+    from ..core.block_store import BlockStore
+    from ..core.tx_validator import ParallelTransactionValidator
 
     from ..core.execute_result import ExecuteResult
@@ -6,12 +6,15 @@ import argparse
 from blockchain.roles.node.node import Node
 from blockchain.roles.wallet.wallet import Wallet
 from blockchain.roles.mining.pow import ProofOfWorkMining
+from blockchain.tools.hash_tools import HASH_ENCODINGS
+from blockchain.network.common.peer import all_peer_protocol
+from blockchain.network.http.http_api_server import HTTP_SERVERS
 
 # 角色支持的类型定义 Const
 SUPPORTED_ROLE_TYPES = {
     "wallet": [],
     "miner": [],  # TODO: 这里可以选择不同的工作量证明机制, 比如PoW, PoS
-    "node": ["http"],
+    "node": ["http", "http-async", "tcp"],  # http-async: 与邻居之间的通信使用asyncio(需要aiohttp); tcp: 与邻居之间使用二进制tcp协议
 }
 
 ################################################
@@ -52,7 +55,7 @@ parser.add_argument(
     "--join-peer-protocol",
     type=str,
     default=None,
-    choices=SUPPORTED_ROLE_TYPES['node'],
+    choices=all_peer_protocol,
     help="Protocol used to connect to peer node"
 )
 
@@ -109,6 +112,106 @@ parser.add_argument(
     help="wallet, miner connected to the node address"
 )
 
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of mining processes, the nonce space is partitioned across them (Only supports -r miner, default: 1)"
+)
+
+parser.add_argument(
+    "--mempool-max-txs",
+    type=int,
+    default=None,
+    help="Maximum number of transactions kept in the transaction pool, lowest priority ones are evicted (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--mempool-max-bytes",
+    type=int,
+    default=None,
+    help="Maximum serialized size of the transaction pool in bytes (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--block-max-txs",
+    type=int,
+    default=None,
+    help="Maximum number of transactions packed into one mining block (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--data-dir",
+    type=str,
+    default=None,
+    help="Directory used to persist blocks, the chain is reloaded from it on restart (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--validation-workers",
+    type=int,
+    default=1,
+    help="Number of processes used to verify block transaction signatures (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--hash-encoding",
+    type=str,
+    choices=HASH_ENCODINGS,
+    default='json',
+    help="Data encoding used for block/transaction hashing, must be the same across the network (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--archive-depth",
+    type=int,
+    default=None,
+    help="Keep only the newest N blocks in memory, older blocks are loaded from --data-dir on demand (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--broadcast-workers",
+    type=int,
+    default=8,
+    help="Number of threads used to broadcast blocks/transactions to peers concurrently (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--server",
+    type=str,
+    choices=HTTP_SERVERS,
+    default='dev',
+    help="HTTP server running the node API: dev (Flask development server) or waitress (multi-threaded production server) (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--server-threads",
+    type=int,
+    default=8,
+    help="Number of worker threads of the waitress server (Only supports -r node --server waitress)"
+)
+
+parser.add_argument(
+    "--keep-alive-timeout",
+    type=int,
+    default=120,
+    help="Seconds an idle keep-alive connection is kept open by the waitress server (Only supports -r node --server waitress)"
+)
+
+parser.add_argument(
+    "--max-request-size",
+    type=int,
+    default=16 * 1024 * 1024,
+    help="Maximum request body size in bytes, larger requests are rejected with 413 (Only supports -r node)"
+)
+
+parser.add_argument(
+    "--tcp-port",
+    type=int,
+    default=None,
+    help="Port used for the binary protocol between peers, wallets and miners keep using --port (Only supports -t tcp, default: port + 1000)"
+)
+
 ################################################
 # main functions
 ################################################
@@ -137,9 +240,9 @@ def generate_wallet():
     print(f"Public Key(wallet address): <{new_wallet.pubkey}>")
     print(f"Secret Key(wallet password, Never disclose!!): <{new_wallet.seckey}>")
 
-def run_miner(public_key, connect_node_addr, host, port, using_testing_nexus: bool, testing_nexus_addr):
+def run_miner(public_key, connect_node_addr, host, port, using_testing_nexus: bool, testing_nexus_addr, workers: int = 1):
     #TODO: Miner GUI界面
-    miner = ProofOfWorkMining(miner_addr=public_key, node_addr=connect_node_addr)
+    miner = ProofOfWorkMining(miner_addr=public_key, node_addr=connect_node_addr, workers=workers)
 
     if using_testing_nexus:
         from blockchain.testing.miner_debug_api import MinerDebugAPI
@@ -151,11 +254,40 @@ def run_node_http(
         # testing nexus connection
         using_testing_nexus: bool = False, testing_nexus_addr = None,
         # blockchain info
-        with_genesis_block: bool = False
+        with_genesis_block: bool = False,
+        # transaction pool info
+        mempool_max_txs: int | None = None, mempool_max_bytes: int | None = None, block_max_txs: int | None = None,
+        # storage info
+        data_dir: str | None = None, archive_depth: int | None = None,
+        # validation info
+        validation_workers: int = 1,
+        # chain params
+        hash_encoding: str = 'json',
+        # network info
+        broadcast_workers: int = 8, async_peer_client: bool = False,
+        # api server info
+        server: str = 'dev', server_threads: int = 8, keep_alive_timeout: int = 120,
+        max_request_size: int | None = 16 * 1024 * 1024,
+        # 节点之间使用tcp协议时的端口, None为使用HTTP协议
+        tcp_port: int | None = None
     ):
-    from blockchain.network.http.http_api_server import HTTPAPI
-    http_api = HTTPAPI(host, port)
-    node = Node(api=http_api, with_genesis_block=with_genesis_block)
+    http_options = dict(
+        server=server, threads=server_threads,
+        keep_alive_timeout=keep_alive_timeout, max_request_size=max_request_size
+    )
+    if tcp_port is None:
+        from blockchain.network.http.http_api_server import HTTPAPI
+        http_api = HTTPAPI(host, port, **http_options)
+    else:
+        from blockchain.network.tcp.tcp_api_server import TCPAPI
+        http_api = TCPAPI(host, port, tcp_port, **http_options)
+    node = Node(
+        api=http_api, with_genesis_block=with_genesis_block,
+        mempool_max_txs=mempool_max_txs, mempool_max_bytes=mempool_max_bytes, block_max_txs=block_max_txs,
+        data_dir=data_dir, archive_depth=archive_depth,
+        validation_workers=validation_workers, hash_encoding=hash_encoding,
+        broadcast_workers=broadcast_workers, async_peer_client=async_peer_client
+    )
 
     if join_peer_addr and join_peer_protocol:
         node.set_join_peer(join_peer_protocol, join_peer_addr)
@@ -203,16 +335,28 @@ def main():
         run_miner(
             args.public_key, args.connect_node_addr,
             args.host, args.port,
-            args.using_testing_nexus, args.testing_nexus_addr
+            args.using_testing_nexus, args.testing_nexus_addr,
+            args.workers
         )
 
     elif args.role == "node":
-        if args.type == "http":
+        if args.archive_depth is not None and not args.data_dir:
+            print("--archive-depth requires --data-dir.", file=sys.stderr)
+            sys.exit(1)
+
+        if args.type in ("http", "http-async", "tcp"):
             with_gb = True if args.with_genesis_block else False
             run_node_http(
                 args.host, args.port, args.join_peer_protocol, args.join_peer_addr,
                 args.using_testing_nexus, args.testing_nexus_addr,
-                with_gb
+                with_gb,
+                args.mempool_max_txs, args.mempool_max_bytes, args.block_max_txs,
+                args.data_dir, args.archive_depth,
+                args.validation_workers,
+                args.hash_encoding,
+                args.broadcast_workers, args.type == "http-async",
+                args.server, args.server_threads, args.keep_alive_timeout, args.max_request_size,
+                (args.tcp_port or args.port + 1000) if args.type == "tcp" else None
             )
         else:
             print(f"Node type '{args.type}' is not supported.", file=sys.stderr)
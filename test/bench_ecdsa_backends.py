@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : bench_ecdsa_backends.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/11 20:30
+
+"""
+签名算法实现的基准测试:
+对每个已安装的实现(coincurve / cryptography / ecdsa)测量签名与验签的吞吐量,
+并交叉验证各实现生成的签名可以被其他实现验证
+
+PYTHONPATH=. python test/bench_ecdsa_backends.py [ops]
+"""
+# std import
+import sys
+from time import perf_counter
+
+# local import
+from blockchain.tools.ecdsa_sign_tools import (
+    BACKENDS, ECDSABackend, ECDSABackendNotAvailableError, select_backend
+)
+
+
+DATA = b'0' * 64  # 与交易hash(hex字符串)的长度相同
+
+
+def timeit(name: str, func, ops: int):
+    start = perf_counter()
+    for _ in range(ops):
+        func()
+    elapsed = perf_counter() - start
+    print(f"{name:<40} {ops / elapsed:>10.0f} ops/s  {elapsed / ops * 1e6:>10.2f} us/op")
+
+
+def bench(backend: ECDSABackend, ops: int):
+    pub, sec = backend.generate_keys()
+    sk = backend.load_signing_key(sec)
+    vk = backend.load_verifying_key(pub)
+    signature = backend.sign(sk, DATA)
+
+    timeit(f"{backend.name} sign", lambda: backend.sign(sk, DATA), ops)
+    timeit(f"{backend.name} verify", lambda: backend.verify(vk, signature, DATA), ops)
+
+    vk = backend.optimize_verifying_key(vk)
+    timeit(f"{backend.name} verify (optimized key)", lambda: backend.verify(vk, signature, DATA), ops)
+
+
+def cross_check(backends: list[ECDSABackend]):
+    for signer in backends:
+        pub, sec = signer.generate_keys()
+        signature = signer.sign(signer.load_signing_key(sec), DATA)
+        for verifier in backends:
+            ok = verifier.verify(verifier.load_verifying_key(pub), signature, DATA)
+            print(f"{signer.name:>12} -> {verifier.name:<12} {'ok' if ok else 'FAILED'}")
+
+
+def main(ops: int):
+    backends = []
+    for name in BACKENDS:
+        try:
+            backends.append(select_backend(name))
+        except ECDSABackendNotAvailableError:
+            print(f"{name}: not installed, skipped")
+
+    for b in backends:
+        bench(b, ops)
+    cross_check(backends)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,123 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : bench_http_server.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/15 10:40
+
+"""
+node HTTP API的负载测试:
+在子进程中启动一个node(可选择API服务器), 以多个并发客户端(keep-alive连接池)请求
+GET /balance/<addr> 与 POST /transaction, 输出吞吐量与延迟分布
+
+PYTHONPATH=. python test/bench_http_server.py [--server dev|waitress] [--threads 8] [--requests 2000] [--concurrency 16]
+"""
+# std import
+import sys
+import time
+import argparse
+import subprocess
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd import
+import requests
+from loguru import logger
+
+# local import
+from blockchain.core.transaction import Transaction
+from blockchain.tools.http_client_json import JSONClient
+
+
+# 创世区块地址(见Node.generate_genesis_block), 持有创世交易的余额, 用于生成/transaction的请求数据
+GENESIS_PUBKEY = "49ea27e563177bd60bd9fe529f0787e3323daea48a8d44f7e5094dbc6049fd039855ad607f43a5ae31f63fb098ce5b137b9509c6ab6775d8d11cd1f849ad24d4"
+GENESIS_SECKEY = "082484320cf453585e768e16e87837edeb2ab8aa502a951354b527c57f5b81a4"
+
+
+def start_node(server: str, threads: int, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [
+            sys.executable, 'main.py', '-r', 'node', '-t', 'http', '-p', str(port), '--with-genesis-block',
+            '--server', server, '--server-threads', str(threads)
+        ],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    for _ in range(100):
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/alive', timeout=1).ok:
+                return proc
+        except requests.ConnectionError:
+            time.sleep(0.1)
+
+    proc.kill()
+    raise RuntimeError("node未能启动")
+
+
+def make_txs(num: int) -> list[bytes]:
+    """
+    预先生成并签名交易, 签名耗时不计入测试
+    """
+    now = int(time.time())
+    txs = []
+    for i in range(num):
+        tx = Transaction(saddr=GENESIS_PUBKEY, raddr=f'bench-{i}', amount=1, timestamp=now)
+        tx.sign(GENESIS_SECKEY)
+        txs.append(tx.encoded())
+    return txs
+
+
+def run_load(name: str, request, payloads: list, concurrency: int):
+    latencies = []
+
+    def call(payload):
+        start = perf_counter()
+        res = request(payload)
+        latencies.append(perf_counter() - start)
+        return res
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, payloads))
+    elapsed = perf_counter() - start
+
+    failed = sum(1 for r in results if r is None or (isinstance(r, dict) and r.get('success') is False))
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(
+        f"{name:<24} {len(payloads) / elapsed:>10.0f} req/s  "
+        f"p50 {p50:>7.2f} ms  p99 {p99:>7.2f} ms  failed {failed}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", default='waitress', choices=('dev', 'waitress'))
+    parser.add_argument("--threads", type=int, default=8, help="waitress worker threads")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=5890)
+    args = parser.parse_args()
+
+    logger.remove()
+    addr = f'http://127.0.0.1:{args.port}'
+    client = JSONClient()
+
+    txs = make_txs(args.requests)
+    proc = start_node(args.server, args.threads, args.port)
+    try:
+        print(f"server: {args.server}, threads: {args.threads}, requests: {args.requests}, concurrency: {args.concurrency}")
+        run_load(
+            "GET /balance/<addr>", lambda _: client.get(f'{addr}/balance/{GENESIS_PUBKEY}'),
+            range(args.requests), args.concurrency
+        )
+        run_load(
+            "POST /transaction", lambda tx: client.post_encoded(f'{addr}/transaction', payload=tx),
+            txs, args.concurrency
+        )
+    finally:
+        proc.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : bench_tcp_gossip.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/15 17:00
+
+"""
+节点之间交易gossip的吞吐量测试:
+在子进程中启动一个tcp类型的node, 分别以HTTP(POST /broadcast/tx, 每笔交易一个请求)
+与tcp协议(TX_BATCH, 每个消息一批交易)向其发送相同数量的已签名交易, 输出每秒进入交易池的交易数量
+
+PYTHONPATH=. python test/bench_tcp_gossip.py [--txs 5000] [--batch 1024] [--concurrency 16] [--validation-workers 1]
+"""
+# std import
+import sys
+import time
+import argparse
+import subprocess
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd import
+import requests
+from loguru import logger
+
+# local import
+from blockchain.core.transaction import Transaction
+from blockchain.network.common.peer import NetworkNodePeer
+from blockchain.network.tcp.tcp_peer_client_adapter import TCPPeerClientAdapter
+from blockchain.tools.http_client_json import JSONClient
+
+
+# 创世区块地址(见Node.generate_genesis_block), 持有创世交易的余额
+GENESIS_PUBKEY = "49ea27e563177bd60bd9fe529f0787e3323daea48a8d44f7e5094dbc6049fd039855ad607f43a5ae31f63fb098ce5b137b9509c6ab6775d8d11cd1f849ad24d4"
+GENESIS_SECKEY = "082484320cf453585e768e16e87837edeb2ab8aa502a951354b527c57f5b81a4"
+
+
+def start_node(port: int, tcp_port: int, num_txs: int, validation_workers: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [
+            sys.executable, 'main.py', '-r', 'node', '-t', 'tcp', '-p', str(port), '--tcp-port', str(tcp_port),
+            '--with-genesis-block', '--mempool-max-txs', str(num_txs * 2),
+            '--validation-workers', str(validation_workers)
+        ],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    for _ in range(100):
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/alive', timeout=1).ok:
+                return proc
+        except requests.ConnectionError:
+            time.sleep(0.1)
+
+    proc.kill()
+    raise RuntimeError("node未能启动")
+
+
+def make_txs(num: int) -> list[Transaction]:
+    """
+    预先生成并签名交易, 签名耗时不计入测试
+    """
+    now = int(time.time())
+    txs = []
+    for i in range(num):
+        tx = Transaction(saddr=GENESIS_PUBKEY, raddr=f'bench-{i}', amount=1, timestamp=now)
+        tx.sign(GENESIS_SECKEY)
+        txs.append(tx)
+    return txs
+
+
+def bench_http(addr: str, txs: list[Transaction], concurrency: int) -> tuple[float, int]:
+    client = JSONClient()
+
+    def send(tx: Transaction):
+        res = client.post_encoded(f'{addr}/broadcast/tx', payload=tx.encoded())
+        return bool(res and res.get('success'))
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        accepted = sum(executor.map(send, txs))
+    return perf_counter() - start, accepted
+
+
+def bench_tcp(addr: str, txs: list[Transaction], batch: int) -> tuple[float, int]:
+    adapter = TCPPeerClientAdapter()
+    peer = NetworkNodePeer(protocol='tcp', addr=addr)
+
+    start = perf_counter()
+    accepted = 0
+    for i in range(0, len(txs), batch):
+        accepted += adapter.send_txs(peer, txs[i:i + batch])['accepted']
+    return perf_counter() - start, accepted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--txs", type=int, default=5000, help="不超过创世交易的金额(10000)")
+    parser.add_argument("--batch", type=int, default=1024, help="tcp每个TX_BATCH消息的交易数量")
+    parser.add_argument("--concurrency", type=int, default=16, help="HTTP并发请求数量")
+    parser.add_argument("--validation-workers", type=int, default=1, help="node的验签进程数量, TX_BATCH整批验签时使用")
+    parser.add_argument("--port", type=int, default=5891)
+    args = parser.parse_args()
+
+    logger.remove()
+    tcp_port = args.port + 1000
+    print(f"txs: {args.txs}, tcp batch: {args.batch}, http concurrency: {args.concurrency}")
+
+    # 每种方式使用一个新启动的节点, 避免交易重复
+    for name in ('http', 'tcp'):
+        txs = make_txs(args.txs)
+        proc = start_node(args.port, tcp_port, args.txs, args.validation_workers)
+        try:
+            if name == 'http':
+                elapsed, accepted = bench_http(f'http://127.0.0.1:{args.port}', txs, args.concurrency)
+            else:
+                elapsed, accepted = bench_tcp(f'tcp://127.0.0.1:{tcp_port}', txs, args.batch)
+        finally:
+            proc.kill()
+            proc.wait()
+
+        print(f"{name:<6} {args.txs / elapsed:>10.0f} txs/s  elapsed {elapsed:>7.2f} s  accepted {accepted}")
+
+
+if __name__ == '__main__':
+    main()
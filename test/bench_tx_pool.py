@@ -0,0 +1,81 @@
+# -*- coding: UTF-8 -*-
+# @Project: BT-full-impl-python
+# @File   : bench_tx_pool.py
+# @Author : Xavier Wu
+# @Date   : 2025/9/7 11:20
+
+"""
+交易池微基准测试:
+在交易池中放入大量待确认交易(默认100k), 测量 去重/确认/清除/挖矿数据 各操作的耗时
+
+PYTHONPATH=. python test/bench_tx_pool.py [pending_tx_num]
+"""
+# std import
+import sys
+from time import perf_counter
+
+# 3rd import
+from loguru import logger
+
+# local import
+from blockchain.core.block import Block
+from blockchain.core.tx_pool import TransactionPool
+from blockchain.core.transaction import Transaction
+
+
+class _FakeBlockChain:
+    pow_reward = 1
+
+    def compute_balance(self, wallet_addr) -> int:
+        return 0
+
+
+class _FakeNode:
+    """
+    只提供交易池依赖的组件, 不启动网络
+    """
+    class _Notifier:
+        def notify(self): pass
+
+    def __init__(self):
+        self.task_queue = None
+        self.peer_client = None
+        self.blockchain = _FakeBlockChain()
+        self.block_template = self._Notifier()
+
+
+def make_txs(num: int) -> list[Transaction]:
+    # 系统奖励类型的交易(来自peer)不需要签名与余额检查, 只测量交易池本身的数据结构开销
+    txs = []
+    for i in range(num):
+        tx = Transaction(saddr=None, raddr=f'addr-{i % 1000}', amount=i, timestamp=i)
+        tx.mark_from_peer()
+        txs.append(tx)
+    return txs
+
+
+def timeit(name: str, func, ops: int):
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+    print(f"{name:<40} {elapsed * 1000:>10.2f} ms  {elapsed / ops * 1e6:>8.2f} us/op")
+
+
+def main(pending_tx_num: int):
+    logger.remove()  # 日志输出会掩盖数据结构本身的开销
+
+    pool = TransactionPool(_FakeNode())
+    txs = make_txs(pending_tx_num)
+    block_txs = txs[-1000:]
+    block = Block(index=2, timestamp=0, transactions=block_txs, nonce=0, prev_hash=None, difficulty=4)
+
+    print(f"pending txs: {pending_tx_num}")
+    timeit("add_transaction (new)", lambda: [pool.add_transaction(t) for t in txs], len(txs))
+    timeit("add_transaction (duplicate)", lambda: [pool.add_transaction(t) for t in txs[:10000]], 10000)
+    timeit("mark_tx (1000 tx block)", lambda: pool.mark_tx(block), len(block_txs))
+    timeit("clear (1000 confirmed)", pool.clear, len(block_txs))
+    timeit("get_mining_data", lambda: pool.get_mining_data('miner'), len(pool))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)